@@ -0,0 +1,99 @@
+import os
+import tempfile
+import unittest
+
+from wappu_spiriter.game_archive import GameArchive, RoundRecord, TeamRecord
+
+ALICE = (1, "Alice")
+BOB = (2, "Bob")
+CAROL = (3, "Carol")
+
+
+def make_round(
+    chat_id: int, round_index: int, teams: list[tuple[tuple, int | None]]
+) -> RoundRecord:
+    return RoundRecord(
+        chat_id=chat_id,
+        status_message_id=10,
+        seed=1234,
+        round_index=round_index,
+        scenario_name="Grilling",
+        instruction_set_index=0,
+        teams=tuple(
+            TeamRecord(
+                players=players,
+                prompts=tuple((user_id, "a drink") for user_id, _ in players),
+                file_id=f"file-{round_index}-{i}",
+                score=score,
+            )
+            for i, (players, score) in enumerate(teams)
+        ),
+    )
+
+
+class TestGameArchive(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.archive = GameArchive(os.path.join(self.directory.name, "archive.db"))
+
+    def tearDown(self):
+        self.archive.close()
+        self.directory.cleanup()
+
+    def test_leaderboards_sum_points_per_chat_and_overall(self):
+        self.archive.append_round(
+            make_round(-100, 0, [((ALICE, BOB), 6), ((CAROL,), 4)])
+        )
+        self.archive.append_round(make_round(-100, 1, [((ALICE,), 3), ((BOB,), None)]))
+        self.archive.append_round(make_round(-200, 0, [((CAROL,), 8)]))
+
+        chat_leaderboard = self.archive.get_leaderboard(-100)
+        self.assertEqual(
+            [
+                (entry.display_name, entry.points, entry.rounds)
+                for entry in chat_leaderboard
+            ],
+            [("Alice", 9, 2), ("Bob", 6, 2), ("Carol", 4, 1)],
+        )
+
+        global_leaderboard = self.archive.get_leaderboard(None, limit=1)
+        self.assertEqual(global_leaderboard[0].display_name, "Carol")
+        self.assertEqual(global_leaderboard[0].points, 12)
+
+    def test_rounds_of_a_game_share_one_game_row(self):
+        self.archive.append_round(make_round(-100, 0, [((ALICE,), 1)]))
+        self.archive.append_round(make_round(-100, 1, [((ALICE,), 1)]))
+
+        connection = self.archive.connect()
+        self.assertEqual(
+            connection.execute("SELECT COUNT(*) FROM games").fetchone(), (1,)
+        )
+        self.assertEqual(
+            connection.execute(
+                "SELECT COUNT(*) FROM rounds JOIN teams ON teams.round_id = rounds.id"
+            ).fetchone(),
+            (2,),
+        )
+
+    def test_chat_leaderboard_uses_index(self):
+        plan = (
+            self.archive.connect()
+            .execute(
+                "EXPLAIN QUERY PLAN SELECT display_name, points, rounds FROM chat_scores WHERE chat_id = ? ORDER BY points DESC, rounds DESC LIMIT 10",
+                (-100,),
+            )
+            .fetchall()
+        )
+
+        self.assertIn("chat_scores_by_points", " ".join(row[-1] for row in plan))
+        self.assertNotIn("TEMP B-TREE", " ".join(row[-1] for row in plan))
+
+    def test_without_path_nothing_is_stored(self):
+        archive = GameArchive(None)
+        archive.append_round(make_round(-100, 0, [((ALICE,), 1)]))
+
+        self.assertEqual(archive.get_leaderboard(-100), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
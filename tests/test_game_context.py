@@ -0,0 +1,74 @@
+import datetime
+import unittest
+
+from telegram import (
+    Chat,
+    ChatMemberMember,
+    ChatMemberOwner,
+    ChatMemberUpdated,
+    Update,
+    User,
+)
+
+from wappu_spiriter.bot import build_application, my_chat_member_handler
+from wappu_spiriter.game_context import GameStateContext
+from wappu_spiriter.replay import FakeBotApiRequest
+from wappu_spiriter.settings import settings
+
+CHAT_ID = -100123
+
+
+def make_promotion_update() -> Update:
+    bot_user = User(1, "Wappu Spiriter", True)
+    return Update(
+        1,
+        my_chat_member=ChatMemberUpdated(
+            Chat(CHAT_ID, Chat.SUPERGROUP),
+            User(10, "Owner", False),
+            datetime.datetime.now(datetime.timezone.utc),
+            ChatMemberMember(bot_user),
+            ChatMemberOwner(bot_user, is_anonymous=False),
+        ),
+    )
+
+
+class TestBotAdminStatusCache(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.request = FakeBotApiRequest()
+        self.app = build_application(self.request)
+        await self.app.initialize()
+        self.context = GameStateContext(self.app)
+
+    async def asyncTearDown(self):
+        await self.app.shutdown()
+
+    def age_cached_status(self, seconds: float) -> None:
+        cache = self.app.bot_data.groupchat_id_to_bot_admin_status
+        is_admin, fetched_at = cache[CHAT_ID]
+        cache[CHAT_ID] = (is_admin, fetched_at - seconds)
+
+    async def test_status_is_reused_within_ttl(self):
+        self.assertFalse(await self.context.is_bot_is_admin_in_chat(CHAT_ID))
+        self.age_cached_status(settings.admin_status_cache_ttl - 1)
+        self.assertFalse(await self.context.is_bot_is_admin_in_chat(CHAT_ID))
+
+        self.assertEqual(self.request.calls["getChatMember"], 1)
+
+    async def test_status_is_fetched_again_after_ttl(self):
+        await self.context.is_bot_is_admin_in_chat(CHAT_ID)
+        self.age_cached_status(settings.admin_status_cache_ttl + 1)
+        await self.context.is_bot_is_admin_in_chat(CHAT_ID)
+
+        self.assertEqual(self.request.calls["getChatMember"], 2)
+
+    async def test_promotion_updates_cached_status(self):
+        self.assertFalse(await self.context.is_bot_is_admin_in_chat(CHAT_ID))
+
+        await my_chat_member_handler(make_promotion_update(), self.context)
+
+        self.assertTrue(await self.context.is_bot_is_admin_in_chat(CHAT_ID))
+        self.assertEqual(self.request.calls["getChatMember"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,271 @@
+import datetime
+import random
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from PIL import Image
+from telegram import Chat, Message, PhotoSize, User, error
+
+from wappu_spiriter.game_model import (
+    Game,
+    Player,
+    Team,
+    get_user_mention,
+    send_requested_full_resolution,
+)
+from wappu_spiriter.outbox import Outbox
+from wappu_spiriter.render import RenderedImage
+from wappu_spiriter.scenario_definitions.scenario_model import (
+    Scenario,
+    ullis_grilling_scenario,
+    ullis_tree_scenario,
+)
+from wappu_spiriter.settings import settings
+
+GROUP_CHAT = Chat(-100123, Chat.SUPERGROUP)
+
+
+def make_message(message_id: int, user: User) -> Message:
+    return Message(message_id, datetime.datetime.now(), GROUP_CHAT, from_user=user)
+
+
+class FakeBot:
+    def __init__(self) -> None:
+        self.edited_texts: list[str] = []
+        self.sent_messages: list[tuple[int, str]] = []
+
+    async def edit_message_text(self, text, chat_id, message_id, **kwargs):
+        self.edited_texts.append(text)
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.sent_messages.append((chat_id, text))
+
+
+def make_photo_message(message_id: int) -> Message:
+    photo = [PhotoSize(f"file-{message_id}", f"file-{message_id}", 10, 10)]
+    return Message(message_id, datetime.datetime.now(), GROUP_CHAT, photo=photo)
+
+
+class FakeAlbumBot:
+    def __init__(self) -> None:
+        self.sent: list[tuple[str, int]] = []
+        self.button_messages: list[Message] = []
+
+    async def send_photo(self, chat_id, photo, caption=None, **kwargs):
+        self.sent.append(("photo", 1))
+        return make_photo_message(len(self.sent))
+
+    async def send_document(self, chat_id, document, **kwargs):
+        self.sent.append(("document", 1))
+
+    async def send_message(self, chat_id, text, reply_markup=None, **kwargs):
+        buttons = [button for row in reply_markup.inline_keyboard for button in row]
+        self.sent.append(("buttons", len(buttons)))
+        message = Message(
+            len(self.sent),
+            datetime.datetime.now(),
+            GROUP_CHAT,
+            text=text,
+            reply_markup=reply_markup,
+        )
+        self.button_messages.append(message)
+        return message
+
+    async def edit_message_reply_markup(self, chat_id, message_id, reply_markup=None):
+        buttons = [button for row in reply_markup.inline_keyboard for button in row]
+        self.sent.append(("edit", len(buttons)))
+
+    async def send_media_group(self, chat_id, media, **kwargs):
+        # what telegram answers to groups out of bounds
+        if not 2 <= len(media) <= 10:
+            raise error.BadRequest("Wrong number of messages to send")
+        self.sent.append(("group", len(media)))
+        return tuple(
+            make_photo_message(len(self.sent) * 100 + i) for i in range(len(media))
+        )
+
+
+class FakeRenderer:
+    async def render(self, scenario):
+        return RenderedImage(full=b"full", preview=bytes([len(scenario.slots)]))
+
+
+def make_game(creator: User) -> Game:
+    game = Game()
+    game.game_chat_id = GROUP_CHAT.id
+    game.game_creator = creator
+    game.player_ids = {creator.id}
+    game.player_ids_to_user = {creator.id: creator}
+    game.player_mentions = [get_user_mention(creator)]
+    game.initalization_msg = make_message(1, creator)
+    return game
+
+
+class TestJoinGame(unittest.IsolatedAsyncioTestCase):
+    async def test_join_storm_is_coalesced(self):
+        users = [User(i, f"Player {i}", False) for i in range(1, 11)]
+        game = make_game(users[0])
+        bot = FakeBot()
+
+        with patch.object(settings, "status_message_edit_interval", 0.05):
+            for i, user in enumerate(users[1:]):
+                await game.join_game(make_message(i + 2, user), bot, False)  # type: ignore[arg-type]
+            assert game.status_message_edit_task is not None
+            await game.status_message_edit_task
+
+        self.assertLessEqual(len(bot.edited_texts), 2)
+        self.assertEqual(bot.edited_texts[-1], game.status_message)
+        self.assertIn("10 players joined", bot.edited_texts[-1])
+
+    async def test_player_list_stays_sorted(self):
+        users = [User(i, name, False) for i, name in enumerate(["b", "c", "a"])]
+        game = make_game(users[0])
+
+        with patch.object(settings, "status_message_edit_interval", 0):
+            for i, user in enumerate(users[1:]):
+                await game.join_game(make_message(i + 2, user), FakeBot(), False)  # type: ignore[arg-type]
+            assert game.status_message_edit_task is not None
+            await game.status_message_edit_task
+
+        self.assertEqual(game.player_mentions, sorted(game.player_mentions))
+        self.assertEqual(len(game.player_mentions), 3)
+
+
+class TestRounds(unittest.IsolatedAsyncioTestCase):
+    async def test_next_round_is_prepared_without_touching_current(self):
+        game = make_game(User(1, "Creator", False))
+        game.outbox = Outbox()
+        game.rng = random.Random(1)
+        game.scenarios = [
+            Scenario(ullis_tree_scenario, 0),
+            Scenario(ullis_grilling_scenario, 0),
+        ]
+        game.teams = [
+            Team([Player(1)], game.scenarios[0]),
+            Team([Player(2), Player(3)], game.scenarios[0]),
+        ]
+        bot = FakeBot()
+
+        first_round = game.prepare_round(0)
+        assert first_round is not None
+        await game.start_round(bot, first_round)  # type: ignore[arg-type]
+        current_slots = {player.id: player.slots for player in game.players}
+
+        second_round = game.prepare_round(1)
+        assert second_round is not None
+        self.assertEqual(game.current_scenario_index, 0)
+        self.assertEqual(
+            {player.id: player.slots for player in game.players}, current_slots
+        )
+
+        bot.sent_messages.clear()
+        await game.start_round(bot, second_round)  # type: ignore[arg-type]
+
+        self.assertEqual(game.current_scenario_index, 1)
+        self.assertEqual(sorted(chat_id for chat_id, _ in bot.sent_messages), [1, 2, 3])
+        for team in game.teams:
+            team_slots = [slot for player in team.players for slot in player.slots]
+            self.assertCountEqual(team_slots, team.scenario.slots)
+        self.assertIsNone(game.prepare_round(2))
+
+    async def test_shared_slot_is_filled_by_first_image(self):
+        game = make_game(User(1, "Creator", False))
+        game.outbox = Outbox()
+        game.rng = random.Random(1)
+        game.scenarios = [Scenario(ullis_tree_scenario, 0)]
+        slot_count = len(game.scenarios[0].slots)
+        # one more player than there are slots, two of them share one
+        players = [Player(i) for i in range(1, slot_count + 2)]
+        game.teams = [Team(players, game.scenarios[0])]
+        bot = FakeBot()
+
+        prepared_round = game.prepare_round(0)
+        assert prepared_round is not None
+        await game.start_round(bot, prepared_round)  # type: ignore[arg-type]
+        first, second = [
+            player for player in players if player.slots[0] is players[0].slots[0]
+        ]
+        bot.sent_messages.clear()
+
+        with patch.object(game, "finish_round") as finish_round:
+            await game.submit_image(
+                first.id,
+                Image.new("RGB", (10, 10)),
+                AsyncMock(),
+                bot,  # type: ignore[arg-type]
+            )
+
+        finish_round.assert_not_called()
+        self.assertIsNotNone(second.slots[0].submitted_image)
+        self.assertEqual(
+            [
+                text.splitlines()[0]
+                for chat_id, text in bot.sent_messages
+                if chat_id == second.id
+            ],
+            [
+                f'🤝 A teammate already sent "{second.slots[0].prompt}"!',
+                "You are finished for the round, wait for others!",
+            ],
+        )
+
+
+class TestAlbumReveal(unittest.IsolatedAsyncioTestCase):
+    async def reveal_album(
+        self, team_count: int, send_full_resolution: bool = True
+    ) -> FakeAlbumBot:
+        game = make_game(User(1, "Creator", False))
+        game.scenarios = [Scenario(ullis_tree_scenario, 0)]
+        game.teams = [
+            Team([Player(i)], game.scenarios[0].clone()) for i in range(team_count)
+        ]
+        bot = FakeAlbumBot()
+
+        with (
+            patch("wappu_spiriter.game_model.get_renderer", FakeRenderer),
+            patch("wappu_spiriter.game_model.upload_cache.path", None),
+            patch.multiple(
+                settings,
+                send_full_resolution=send_full_resolution,
+                send_previews_to_players=False,
+            ),
+        ):
+            revealed = await game.reveal_as_album(bot, game.teams)  # type: ignore[arg-type]
+
+        self.assertEqual(len(revealed), team_count)
+        self.assertTrue(all(team.file_id is not None for team in revealed))
+        return bot
+
+    async def test_single_team_is_sent_without_media_group(self):
+        bot = await self.reveal_album(1)
+
+        self.assertEqual(bot.sent, [("photo", 1), ("document", 1)])
+
+    async def test_eleven_teams_are_split_evenly(self):
+        bot = await self.reveal_album(11)
+
+        self.assertEqual(
+            bot.sent, [("group", 5), ("group", 5), ("group", 6), ("group", 6)]
+        )
+
+    async def test_full_resolution_is_sent_on_request(self):
+        bot = await self.reveal_album(3, send_full_resolution=False)
+        self.assertEqual(bot.sent, [("group", 3), ("buttons", 3)])
+
+        (message,) = bot.button_messages
+        assert message.reply_markup is not None
+        callback_data = message.reply_markup.inline_keyboard[0][1].callback_data
+        assert isinstance(callback_data, str)
+
+        self.assertTrue(
+            await send_requested_full_resolution(bot, message, callback_data)  # type: ignore[arg-type]
+        )
+        # the pressed button is gone, so the file is sent once
+        self.assertFalse(
+            await send_requested_full_resolution(bot, message, callback_data)  # type: ignore[arg-type]
+        )
+        self.assertEqual(bot.sent[2:], [("document", 1), ("edit", 2)])
+
+
+if __name__ == "__main__":
+    unittest.main()
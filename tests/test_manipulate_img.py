@@ -0,0 +1,89 @@
+import unittest
+
+from PIL import Image
+
+from wappu_spiriter.image_related.manipulate_img import (
+    get_fit,
+    make_collage,
+    overlay_pil_image_on_base_image,
+    prepare_overlay,
+)
+
+
+class TestPrepareOverlay(unittest.TestCase):
+    def test_opaque_overlay_has_no_mask(self):
+        overlay = Image.new("RGB", (20, 10), "red")
+        scaled, mask, _ = prepare_overlay(overlay, (10, 5))
+
+        self.assertEqual(scaled.size, (10, 5))
+        self.assertIsNone(mask)
+
+    def test_matching_size_is_not_resized(self):
+        overlay = Image.new("RGBA", (10, 5))
+        scaled, mask, _ = prepare_overlay(overlay, (10, 5))
+
+        self.assertIs(scaled, overlay)
+        self.assertIs(mask, overlay)
+
+    def test_palette_transparency_is_converted(self):
+        overlay = Image.new("P", (10, 5))
+        overlay.info["transparency"] = 0
+        scaled, mask, _ = prepare_overlay(overlay, (10, 5))
+
+        self.assertEqual(scaled.mode, "RGBA")
+        self.assertIs(mask, scaled)
+
+    def test_transparent_pixels_keep_base(self):
+        base = Image.new("RGB", (4, 4), "blue")
+        overlay = Image.new("RGBA", (2, 2), (255, 0, 0, 0))
+        result = overlay_pil_image_on_base_image(base, overlay, ((0, 0), (4, 4)))
+
+        self.assertEqual(result.getpixel((1, 1)), (0, 0, 255))
+        self.assertEqual(base.getpixel((1, 1)), (0, 0, 255))
+
+
+class TestGetFit(unittest.TestCase):
+    def test_stretch_uses_whole_source(self):
+        self.assertEqual(
+            get_fit((400, 200), (100, 100), "stretch"),
+            ((0, 0, 400, 200), (100, 100), (0, 0)),
+        )
+
+    def test_cover_crops_centre_to_slot_aspect(self):
+        self.assertEqual(
+            get_fit((400, 200), (100, 100), "cover"),
+            ((100, 0, 300, 200), (100, 100), (0, 0)),
+        )
+
+    def test_contain_letterboxes_inside_slot(self):
+        self.assertEqual(
+            get_fit((400, 200), (100, 100), "contain"),
+            ((0, 0, 400, 200), (100, 50), (0, 25)),
+        )
+
+    def test_contain_leaves_base_visible(self):
+        base = Image.new("RGB", (100, 100), "blue")
+        overlay = Image.new("RGB", (400, 200), "red")
+        result = overlay_pil_image_on_base_image(
+            base, overlay, ((0, 0), (100, 100)), fit="contain"
+        )
+
+        self.assertEqual(result.getpixel((50, 10)), (0, 0, 255))
+        self.assertEqual(result.getpixel((50, 50)), (255, 0, 0))
+
+
+class TestMakeCollage(unittest.TestCase):
+    def test_tiles_images_in_order(self):
+        colors = ["red", "green", "blue"]
+        images = [Image.new("RGB", (40, 20), color) for color in colors]
+        collage = make_collage(images, 40)
+
+        self.assertEqual(collage.size, (40, 20))
+        self.assertEqual(collage.getpixel((10, 5)), (255, 0, 0))
+        self.assertEqual(collage.getpixel((30, 5)), (0, 128, 0))
+        self.assertEqual(collage.getpixel((10, 15)), (0, 0, 255))
+        self.assertEqual(collage.getpixel((30, 15)), (255, 255, 255))
+
+
+if __name__ == "__main__":
+    unittest.main()
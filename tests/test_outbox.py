@@ -0,0 +1,65 @@
+import unittest
+from unittest.mock import patch
+
+from telegram import error
+
+from wappu_spiriter.outbox import Outbox
+from wappu_spiriter.settings import settings
+
+
+class FakeBot:
+    def __init__(self) -> None:
+        self.started_user_ids: set[int] = set()
+        self.send_attempts = 0
+        self.sent: list[tuple[int, str]] = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.send_attempts += 1
+        if chat_id not in self.started_user_ids:
+            raise error.Forbidden("Forbidden: bot can't initiate conversation")
+        self.sent.append((chat_id, text))
+
+
+class TestOutbox(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.bot = FakeBot()
+        self.outbox = Outbox()
+        patcher = patch.object(settings, "outbox_retry_initial_delay", 60)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def asyncTearDown(self) -> None:
+        for task in self.outbox.retry_tasks.values():
+            task.cancel()
+
+    async def test_unreachable_user_is_not_retried_per_message(self):
+        for i in range(3):
+            await self.outbox.send(self.bot, 1, f"prompt {i}")  # type: ignore[arg-type]
+
+        self.assertEqual(self.bot.send_attempts, 1)
+        self.assertFalse(self.outbox.is_reachable(1))
+
+    async def test_flush_sends_pending_in_order_as_one_batch(self):
+        for i in range(3):
+            await self.outbox.send(self.bot, 1, f"prompt {i}")  # type: ignore[arg-type]
+
+        self.bot.started_user_ids.add(1)
+        delivered = await self.outbox.flush(self.bot, 1)  # type: ignore[arg-type]
+
+        self.assertEqual(delivered, 1)
+        self.assertEqual(self.bot.sent, [(1, "prompt 0\n\nprompt 1\n\nprompt 2")])
+        self.assertTrue(self.outbox.is_reachable(1))
+
+    async def test_expired_messages_are_dropped(self):
+        with patch.object(settings, "outbox_message_ttl", -1):
+            await self.outbox.send(self.bot, 1, "old prompt")  # type: ignore[arg-type]
+
+        self.bot.started_user_ids.add(1)
+        delivered = await self.outbox.flush(self.bot, 1)  # type: ignore[arg-type]
+
+        self.assertEqual(delivered, 0)
+        self.assertEqual(self.bot.sent, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import io
+import unittest
+from unittest.mock import patch
+
+from PIL import Image
+
+from wappu_spiriter.render import (
+    LocalRenderer,
+    ProcessPoolRenderer,
+    read_shared_image,
+    release_shared_memories,
+    share_image,
+)
+from wappu_spiriter.scenario_definitions.scenario_model import (
+    Scenario,
+    ullis_tree_scenario,
+)
+from wappu_spiriter.settings import settings
+
+
+def make_filled_scenario() -> Scenario:
+    scenario = Scenario(ullis_tree_scenario, 0)
+    encoded = io.BytesIO()
+    Image.new("RGB", (300, 200), "red").save(encoded, format="JPEG")
+
+    scenario.slots[0].submitted_image = Image.open(io.BytesIO(encoded.getvalue()))
+    scenario.slots[1].submitted_image = Image.new("RGBA", (50, 80), "blue")
+    scenario.slots[2].submitted_image = Image.new("L", (10, 10), 128)
+    return scenario
+
+
+class TestRenderers(unittest.IsolatedAsyncioTestCase):
+    async def test_process_pool_matches_local_render(self):
+        scenario = make_filled_scenario()
+        renderer = ProcessPoolRenderer(1)
+        try:
+            pooled = Image.open(io.BytesIO((await renderer.render(scenario)).full))
+            collage = Image.open(
+                io.BytesIO((await renderer.render_collage([scenario, scenario])).full)
+            )
+        finally:
+            renderer.shutdown()
+
+        local = Image.open(io.BytesIO((await LocalRenderer().render(scenario)).full))
+
+        self.assertEqual(pooled.size, ullis_tree_scenario.base_img_dimensions)
+        self.assertEqual(pooled.tobytes(), local.tobytes())
+        self.assertEqual(collage.size, (3508, 1240))
+
+    async def test_preview_is_downscaled_from_same_render(self):
+        scenario = make_filled_scenario()
+
+        with patch.object(settings, "preview_max_size", 500):
+            rendered = await LocalRenderer().render(scenario)
+
+        full = Image.open(io.BytesIO(rendered.full))
+        preview = Image.open(io.BytesIO(rendered.preview))
+        self.assertEqual(max(preview.size), 500)
+        self.assertAlmostEqual(
+            preview.width / preview.height, full.width / full.height, places=2
+        )
+        self.assertLess(len(rendered.preview), len(rendered.full))
+
+
+class TestSharedImages(unittest.TestCase):
+    def test_loaded_palette_image_keeps_its_colors(self):
+        encoded = io.BytesIO()
+        image = Image.new("P", (4, 4))
+        image.putpalette([255, 0, 0, 0, 0, 255])
+        image.putpixel((1, 1), 1)
+        image.save(encoded, format="PNG")
+        loaded = Image.open(io.BytesIO(encoded.getvalue()))
+        # loading closes the file, the raw bytes path is taken
+        loaded.load()
+
+        shared_image, shared_memory = share_image(loaded)
+        try:
+            shared = read_shared_image(shared_image)
+        finally:
+            release_shared_memories([shared_memory])
+
+        self.assertEqual(
+            shared.convert("RGB").tobytes(), loaded.convert("RGB").tobytes()
+        )
+        self.assertEqual(shared.convert("RGB").getpixel((1, 1)), (0, 0, 255))
+
+
+if __name__ == "__main__":
+    unittest.main()
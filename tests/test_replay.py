@@ -0,0 +1,107 @@
+import datetime
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from telegram import (
+    Chat,
+    Message,
+    MessageEntity,
+    PhotoSize,
+    Update,
+    User,
+    constants,
+)
+
+from wappu_spiriter.game_archive import game_archive
+from wappu_spiriter.recording import UpdateRecorder, load_recording
+from wappu_spiriter.replay import replay
+from wappu_spiriter.scenario_definitions.scenario_model import (
+    ullis_grilling_scenario,
+    ullis_tree_scenario,
+)
+from wappu_spiriter.settings import settings
+from wappu_spiriter.upload_cache import upload_cache
+
+GROUP_CHAT = Chat(-100123, Chat.SUPERGROUP)
+PLAYERS = [User(10, "Creator", False), User(11, "Joiner", False)]
+# more than anyone's slots per round, extras get a "finished" reply
+PHOTOS_PER_PLAYER = 15
+
+
+def make_updates() -> list[Update]:
+    date = datetime.datetime(2024, 4, 30, tzinfo=datetime.timezone.utc)
+    updates: list[Update] = []
+
+    def add_message(user: User, chat: Chat, **kwargs) -> None:
+        message_id = len(updates) + 1
+        message = Message(message_id, date, chat, from_user=user, **kwargs)
+        updates.append(Update(message_id, message=message))
+
+    def add_command(user: User, command: str) -> None:
+        entity = MessageEntity(constants.MessageEntityType.BOT_COMMAND, 0, len(command))
+        add_message(user, GROUP_CHAT, text=command, entities=[entity])
+
+    add_command(PLAYERS[0], "/new")
+    add_command(PLAYERS[1], "/join")
+    add_command(PLAYERS[0], "/start")
+    for i in range(PHOTOS_PER_PLAYER):
+        for player in PLAYERS:
+            file_id = f"photo-{player.id}-{i}"
+            photo = [PhotoSize(file_id, file_id, 320, 240)]
+            add_message(player, Chat(player.id, Chat.PRIVATE), photo=photo)
+
+    return updates
+
+
+class TestReplay(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "updates.jsonl")
+
+        with patch.object(settings, "game_seed", 1234):
+            recorder = UpdateRecorder(self.path)
+            for update in make_updates():
+                await recorder.record(update, None)  # type: ignore[arg-type]
+            recorder.close()
+
+    async def asyncTearDown(self):
+        self.directory.cleanup()
+
+    def test_recording_keeps_session_seed(self):
+        sessions = load_recording(self.path)
+
+        self.assertEqual(len(sessions), 1)
+        self.assertEqual(sessions[0].game_seed, 1234)
+        self.assertEqual(len(sessions[0].updates), 3 + 2 * PHOTOS_PER_PLAYER)
+
+    async def test_replay_plays_game_through_deterministically(self):
+        scenarios = [ullis_grilling_scenario, ullis_tree_scenario]
+
+        with (
+            patch("wappu_spiriter.game_model.scenario_definitions", scenarios),
+            patch.multiple(
+                settings, reveal_mode="sequential", template_cache_path=None
+            ),
+        ):
+            live_settings = settings.model_dump()
+            live_paths = (upload_cache.path, game_archive.path)
+            first = await replay(self.path)
+            second = await replay(self.path)
+
+            # the replay's overrides don't outlive it
+            self.assertEqual(settings.model_dump(), live_settings)
+            self.assertEqual((upload_cache.path, game_archive.path), live_paths)
+
+        # two rounds of two single player teams, each revealed on its own with a
+        # preview in the group and in the player's DMs
+        self.assertEqual(first[0].calls["sendPhoto"], 8)
+        # full resolution files are opt-in
+        self.assertEqual(first[0].calls["sendDocument"], 0)
+        self.assertEqual(first[0].calls, second[0].calls)
+        self.assertEqual(first[0].updates, 3 + 2 * PHOTOS_PER_PLAYER)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import io
+import unittest
+
+from PIL import Image
+
+from wappu_spiriter.image_related.benchmark_resampling import (
+    make_sample_jpeg,
+    mean_difference,
+)
+from wappu_spiriter.image_related.resampling import (
+    choose_resampling_tier,
+    open_drafted,
+    resize_image,
+)
+from wappu_spiriter.scenario_definitions.scenario_model import scenario_definitions
+
+
+class TestResampling(unittest.TestCase):
+    def test_choose_tier_by_downscale_factor(self):
+        self.assertEqual(choose_resampling_tier((4000, 3000), (222, 222)), "fast")
+        self.assertEqual(choose_resampling_tier((400, 300), (222, 222)), "quality")
+        self.assertEqual(
+            choose_resampling_tier((4000, 3000), (222, 222), "quality"), "quality"
+        )
+
+    def test_draft_keeps_enough_detail(self):
+        sample = make_sample_jpeg((2000, 1500))
+        drafted = open_drafted(Image.open(io.BytesIO(sample)), (300, 300))
+
+        assert drafted is not None
+        self.assertGreaterEqual(drafted.size[0], 300)
+        self.assertGreaterEqual(drafted.size[1], 300)
+        self.assertLess(drafted.size[0], 2000)
+
+    def test_fast_tier_leaves_input_untouched(self):
+        sample = make_sample_jpeg((2000, 1500))
+        image = Image.open(io.BytesIO(sample))
+        resize_image(image, (300, 300), "fast")
+        image.load()
+
+        self.assertEqual(image.size, (2000, 1500))
+
+    def test_fast_tier_matches_quality_for_every_slot(self):
+        sample = make_sample_jpeg((2000, 1500))
+
+        for scenario_definition in scenario_definitions:
+            for slot in scenario_definition.slot_list:
+                fast = resize_image(
+                    Image.open(io.BytesIO(sample)), slot["size"], "fast"
+                )
+                quality = resize_image(
+                    Image.open(io.BytesIO(sample)), slot["size"], "quality"
+                )
+
+                self.assertEqual(fast.size, slot["size"])
+                self.assertLess(mean_difference(fast, quality), 8)
+
+    def test_box_region_is_resized(self):
+        image = Image.new("RGB", (400, 200), "red")
+        image.paste("blue", (200, 0, 400, 200))
+        resized = resize_image(image, (50, 50), "fast", (200, 0, 400, 200))
+
+        self.assertEqual(resized.getpixel((25, 25)), (0, 0, 255))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,29 @@
+import unittest
+
+from PIL import Image
+
+from wappu_spiriter.scenario_definitions.scenario_model import (
+    Scenario,
+    ullis_grilling_scenario,
+)
+
+
+class TestScenario(unittest.TestCase):
+    def test_clone_shares_definition_but_not_slots(self):
+        scenario = Scenario(ullis_grilling_scenario, 1)
+        scenario.slots[0].submitted_image = Image.new("RGB", (1, 1))
+
+        clone = scenario.clone()
+
+        self.assertIs(clone.scenario_definition, scenario.scenario_definition)
+        self.assertEqual(clone.instruction_set_index, 1)
+        self.assertEqual(
+            [slot.prompt for slot in clone.slots],
+            [slot.prompt for slot in scenario.slots],
+        )
+        self.assertIsNot(clone.slots, scenario.slots)
+        self.assertTrue(all(slot.submitted_image is None for slot in clone.slots))
+
+
+if __name__ == "__main__":
+    unittest.main()
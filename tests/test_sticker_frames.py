@@ -0,0 +1,124 @@
+import gzip
+import io
+import json
+import unittest
+
+from PIL import Image
+
+from wappu_spiriter.image_related.manipulate_img import FitMode, prepare_overlay
+from wappu_spiriter.image_related.sticker_frames import (
+    StickerFrameCache,
+    av,
+    can_decode_webm,
+    can_render_tgs,
+    decode_webm_frame,
+    get_frame_size,
+    render_tgs_frame,
+)
+
+# a 512x512 animation of a green square covering the middle half
+LOTTIE_ANIMATION = {
+    "v": "5.5.2",
+    "fr": 30,
+    "ip": 0,
+    "op": 30,
+    "w": 512,
+    "h": 512,
+    "layers": [
+        {
+            "ty": 1,
+            "sc": "#00ff00",
+            "sw": 512,
+            "sh": 512,
+            "ip": 0,
+            "op": 30,
+            "st": 0,
+            "ks": {
+                "o": {"a": 0, "k": 100},
+                "r": {"a": 0, "k": 0},
+                "p": {"a": 0, "k": [256, 256, 0]},
+                "a": {"a": 0, "k": [256, 256, 0]},
+                "s": {"a": 0, "k": [50, 50, 100]},
+            },
+        }
+    ],
+}
+
+
+def make_webm(image: Image.Image) -> bytes:
+    assert av is not None
+    import numpy
+
+    output = io.BytesIO()
+    with av.open(output, "w", format="webm") as container:
+        stream = container.add_stream("libvpx-vp9", rate=30)
+        stream.width, stream.height = image.size
+        stream.pix_fmt = "yuva420p"
+        frame = av.VideoFrame.from_ndarray(numpy.asarray(image), format="rgba")
+        for packet in stream.encode(frame.reformat(format="yuva420p")):
+            container.mux(packet)
+        for packet in stream.encode():
+            container.mux(packet)
+
+    return output.getvalue()
+
+
+class TestFrameSize(unittest.TestCase):
+    def test_frame_fits_slot_without_scaling(self):
+        fits: tuple[FitMode, ...] = ("cover", "contain", "stretch")
+        for fit in fits:
+            frame_size = get_frame_size((512, 384), (300, 500), fit)
+            overlay = Image.new("RGBA", frame_size)
+
+            fitted, _, _ = prepare_overlay(overlay, (300, 500), "quality", fit)
+
+            self.assertLessEqual(abs(fitted.width - min(frame_size[0], 300)), 1)
+            self.assertLessEqual(abs(fitted.height - min(frame_size[1], 500)), 1)
+
+    def test_cover_frame_covers_slot(self):
+        self.assertEqual(get_frame_size((512, 512), (300, 600), "cover"), (600, 600))
+
+
+class TestStickerFrameCache(unittest.TestCase):
+    def test_least_recently_used_frame_is_dropped(self):
+        cache = StickerFrameCache(2)
+        frames = [Image.new("RGBA", (1, 1)) for _ in range(3)]
+
+        cache.set("a", (1, 1), frames[0])
+        cache.set("b", (1, 1), frames[1])
+        self.assertIs(cache.get("a", (1, 1)), frames[0])
+        cache.set("c", (1, 1), frames[2])
+
+        self.assertIsNone(cache.get("b", (1, 1)))
+        self.assertIs(cache.get("a", (1, 1)), frames[0])
+        self.assertIsNone(cache.get("a", (2, 2)))
+
+
+class TestStickerDecoding(unittest.TestCase):
+    @unittest.skipUnless(can_render_tgs(), "rlottie-python is not installed")
+    def test_tgs_is_rendered_at_frame_size(self):
+        tgs = gzip.compress(json.dumps(LOTTIE_ANIMATION).encode())
+
+        frame = render_tgs_frame(tgs, (200, 200))
+
+        self.assertEqual((frame.mode, frame.size), ("RGBA", (200, 200)))
+        self.assertEqual(frame.getchannel("A").getpixel((0, 0)), 0)
+        self.assertEqual(frame.getpixel((100, 100)), (0, 255, 0, 255))
+
+    @unittest.skipUnless(can_decode_webm(), "PyAV is not installed")
+    def test_webm_first_frame_keeps_alpha(self):
+        image = Image.new("RGBA", (64, 48), (0, 0, 0, 0))
+        image.paste((0, 0, 255, 255), (16, 16, 48, 32))
+
+        frame = decode_webm_frame(make_webm(image), (128, 96))
+
+        self.assertEqual((frame.mode, frame.size), ("RGBA", (128, 96)))
+        # lossy, so only near the source
+        alpha = frame.getchannel("A").tobytes()
+        blue = frame.getchannel("B").tobytes()
+        self.assertLess(alpha[4 * frame.width + 4], 16)
+        self.assertGreater(blue[48 * frame.width + 64], 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import random
+import unittest
+from collections import Counter
+
+from wappu_spiriter.team_formation import assign_slots, form_teams, get_team_count
+
+
+class TestFormTeams(unittest.TestCase):
+    def test_small_groups_keep_solo_and_pair_teams(self):
+        self.assertEqual(
+            [get_team_count(players, 6) for players in range(1, 11)],
+            [1, 2, 3, 2, 2, 3, 3, 4, 4, 5],
+        )
+
+    def test_large_group_is_bounded_and_balanced(self):
+        teams = form_teams(range(24), 6, random.Random(1))
+
+        self.assertEqual(len(teams), 6)
+        self.assertEqual({len(team) for team in teams}, {4})
+        self.assertCountEqual([p for team in teams for p in team], range(24))
+
+    def test_team_count_is_capped_however_many_join(self):
+        teams = form_teams(range(600), 6, random.Random(1))
+
+        self.assertEqual(len(teams), 6)
+        self.assertEqual({len(team) for team in teams}, {100})
+
+    def test_uneven_group_sizes_differ_by_one(self):
+        teams = form_teams(range(23), 4, random.Random(1))
+
+        self.assertEqual(sorted(len(team) for team in teams), [5, 6, 6, 6])
+
+    def test_same_seed_forms_same_teams(self):
+        self.assertEqual(
+            form_teams({5, 3, 9, 1}, 6, random.Random(7)),
+            form_teams({1, 9, 3, 5}, 6, random.Random(7)),
+        )
+
+
+class TestAssignSlots(unittest.TestCase):
+    def test_small_team_gets_several_slots_each(self):
+        assignments = assign_slots(["a", "b", "c", "d"], [1, 2])
+
+        self.assertEqual([slot for slot, _ in assignments], ["a", "b", "c", "d"])
+        self.assertEqual(Counter(player for _, player in assignments), {1: 2, 2: 2})
+
+    def test_full_team_gets_one_distinct_slot_each(self):
+        assignments = assign_slots(["a", "b", "c"], [1, 2, 3])
+
+        self.assertEqual(assignments, [("a", 1), ("b", 2), ("c", 3)])
+
+    def test_large_team_shares_slots_evenly(self):
+        assignments = assign_slots(["a", "b", "c"], list(range(10)))
+
+        self.assertEqual(sorted(player for _, player in assignments), list(range(10)))
+        self.assertEqual(
+            Counter(slot for slot, _ in assignments), {"a": 4, "b": 3, "c": 3}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+
+from PIL import Image
+
+from wappu_spiriter.image_related import template_cache
+from wappu_spiriter.image_related.template_cache import (
+    build_template_cache,
+    get_mapped_template,
+    map_template_cache,
+)
+
+TEMPLATE = ("image_templates/grill.png", (3508, 2480))
+
+
+class TestTemplateCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.addCleanup(template_cache.mapped_templates.clear)
+
+    def test_mapped_template_matches_decoded_template(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache_path = os.path.join(directory, "templates.raw")
+            build_template_cache(cache_path, [TEMPLATE])
+            self.assertTrue(map_template_cache(cache_path))
+
+        mapped = get_mapped_template(*TEMPLATE)
+        assert mapped is not None
+        with Image.open(TEMPLATE[0]) as image:
+            self.assertEqual(mapped.tobytes(), image.convert("RGBA").tobytes())
+        self.assertTrue(mapped.readonly)
+
+    def test_up_to_date_cache_is_not_rebuilt(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache_path = os.path.join(directory, "templates.raw")
+            build_template_cache(cache_path, [TEMPLATE])
+            built_at = os.stat(cache_path).st_mtime_ns
+
+            build_template_cache(cache_path, [TEMPLATE])
+
+            self.assertEqual(os.stat(cache_path).st_mtime_ns, built_at)
+
+    def test_missing_cache_is_not_mapped(self):
+        self.assertFalse(map_template_cache("does-not-exist.raw"))
+
+
+if __name__ == "__main__":
+    unittest.main()
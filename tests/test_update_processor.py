@@ -0,0 +1,94 @@
+import asyncio
+import datetime
+import unittest
+
+from telegram import Chat, Message, Update
+
+from wappu_spiriter.update_processor import (
+    GameOrderedUpdateProcessor,
+    worker_slot_released,
+)
+
+
+def make_update(update_id: int, chat_id: int) -> Update:
+    chat = Chat(chat_id, Chat.SUPERGROUP)
+    message = Message(update_id, datetime.datetime.now(), chat)
+    return Update(update_id, message=message)
+
+
+class TestGameOrderedUpdateProcessor(unittest.IsolatedAsyncioTestCase):
+    async def test_same_chat_is_processed_in_order(self):
+        processor = GameOrderedUpdateProcessor(4, 10)
+        processed = []
+
+        async def handle(update_id: int, delay: float):
+            await asyncio.sleep(delay)
+            processed.append(update_id)
+
+        await asyncio.gather(
+            processor.process_update(make_update(1, -1), handle(1, 0.02)),
+            processor.process_update(make_update(2, -1), handle(2, 0)),
+            processor.process_update(make_update(3, -2), handle(3, 0)),
+        )
+
+        self.assertEqual(processed, [3, 1, 2])
+
+    async def test_redelivered_update_is_dropped(self):
+        processor = GameOrderedUpdateProcessor(4, 10)
+        processed = []
+
+        async def handle(update_id: int):
+            processed.append(update_id)
+
+        await processor.process_update(make_update(1, -1), handle(1))
+        await processor.process_update(make_update(1, -1), handle(1))
+
+        self.assertEqual(processed, [1])
+
+    async def test_overflow_is_shed(self):
+        processor = GameOrderedUpdateProcessor(1, 1)
+        processed = []
+
+        async def handle(update_id: int):
+            await asyncio.sleep(0.01)
+            processed.append(update_id)
+
+        await asyncio.gather(
+            processor.process_update(Update(1), handle(1)),
+            processor.process_update(Update(2), handle(2)),
+        )
+
+        self.assertEqual(processed, [1])
+        self.assertEqual(processor.pending_updates, 0)
+
+    async def test_waiting_update_lends_its_worker(self):
+        processor = GameOrderedUpdateProcessor(1, 10)
+        processed: list[int | str] = []
+        revealed = asyncio.Event()
+
+        async def reveal():
+            async with worker_slot_released():
+                await revealed.wait()
+            processed.append("reveal")
+
+        async def handle(update_id: int):
+            processed.append(update_id)
+            revealed.set()
+
+        # without lending the reveal would wait forever on the only worker
+        await asyncio.wait_for(
+            asyncio.gather(
+                processor.process_update(make_update(1, -1), reveal()),
+                # same game, waits for the reveal to finish
+                processor.process_update(make_update(2, -1), handle(2)),
+                # another game, runs on the lent worker
+                processor.process_update(make_update(3, -2), handle(3)),
+            ),
+            1,
+        )
+
+        self.assertEqual(processed, [3, "reveal", 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import datetime
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from telegram import Chat, Message, PhotoSize
+
+from wappu_spiriter.settings import settings
+from wappu_spiriter.upload_cache import UploadCache, get_content_hash
+
+
+class FakeBot:
+    def __init__(self) -> None:
+        self.sent_photos: list[object] = []
+
+    async def send_photo(self, chat_id, photo, caption=None, **kwargs):
+        self.sent_photos.append(photo)
+        file_id = photo if isinstance(photo, str) else f"file-{len(self.sent_photos)}"
+        return Message(
+            len(self.sent_photos),
+            datetime.datetime.now(),
+            Chat(chat_id, Chat.SUPERGROUP),
+            photo=(PhotoSize(file_id, file_id, 10, 10),),
+        )
+
+
+class TestUploadCache(unittest.IsolatedAsyncioTestCase):
+    async def test_identical_content_is_uploaded_once(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "upload_cache.json")
+            bot = FakeBot()
+
+            cache = UploadCache(path, 10)
+            await cache.send_photo(bot, -1, b"image")  # type: ignore[arg-type]
+            await cache.close()
+            # a new instance reads what the previous one persisted
+            await UploadCache(path, 10).send_photo(bot, -1, b"image")  # type: ignore[arg-type]
+            await UploadCache(path, 10).send_photo(bot, -1, b"other")  # type: ignore[arg-type]
+
+        self.assertEqual(bot.sent_photos, [b"image", "file-1", b"other"])
+
+    async def test_least_recently_used_entries_are_dropped(self):
+        cache = UploadCache(None, 2)
+        cache.set(b"a", "file-a")
+        cache.set(b"b", "file-b")
+        cache.get(b"a")
+        cache.set(b"c", "file-c")
+
+        self.assertEqual(cache.get(b"a"), "file-a")
+        self.assertIsNone(cache.get(b"b"))
+        self.assertEqual(cache.get(b"c"), "file-c")
+
+    async def test_saves_are_batched_and_skip_transient_entries(self):
+        with (
+            tempfile.TemporaryDirectory() as directory,
+            patch.object(settings, "upload_cache_save_interval", 0.05),
+        ):
+            path = os.path.join(directory, "upload_cache.json")
+            cache = UploadCache(path, 10)
+            bot = FakeBot()
+
+            await cache.send_photo(bot, -1, b"sticker")  # type: ignore[arg-type]
+            await cache.send_photo(bot, -1, b"composite", persist=False)  # type: ignore[arg-type]
+            await cache.send_photo(bot, -1, b"other")  # type: ignore[arg-type]
+            # nothing is written on the upload itself
+            self.assertFalse(os.path.exists(path))
+
+            save_task = cache.save_task
+            await cache.close()
+            with open(path) as f:
+                saved = json.load(f)
+
+        # one background save covered all three uploads
+        self.assertIs(cache.save_task, save_task)
+        self.assertEqual(
+            saved,
+            {
+                get_content_hash(b"sticker"): "file-1",
+                get_content_hash(b"other"): "file-3",
+            },
+        )
+        # the composite is still reused while the bot runs
+        self.assertEqual(cache.get(b"composite"), "file-2")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,17 +1,33 @@
+import asyncio
 import logging
+from typing import get_args
 
 from telegram import Update, constants
 from telegram.ext import (
+    Application,
     ApplicationBuilder,
+    CallbackQueryHandler,
+    ChatMemberHandler,
     CommandHandler,
     ContextTypes,
     MessageHandler,
+    TypeHandler,
     filters,
 )
-
-from wappu_spiriter.settings import settings
-from wappu_spiriter.game_context import BotState, GameStateContext
-from wappu_spiriter.game_model import Game
+from telegram.request import BaseRequest
+
+from wappu_spiriter.recording import UpdateRecorder
+from wappu_spiriter.render import prepare_template_cache, shutdown_renderer
+from wappu_spiriter.settings import RevealMode, settings
+from wappu_spiriter.update_processor import GameOrderedUpdateProcessor
+from wappu_spiriter.upload_cache import upload_cache
+from wappu_spiriter.game_archive import game_archive
+from wappu_spiriter.game_context import ADMIN_STATUSES, BotState, GameStateContext
+from wappu_spiriter.game_model import (
+    FULL_RESOLUTION_CALLBACK_PREFIX,
+    Game,
+    send_requested_full_resolution,
+)
 from wappu_spiriter.image_related.img_from_tg_msg import (
     get_picture_pil_image_from_message,
     get_sticker_pil_image_from_message,
@@ -32,13 +48,9 @@ async def start_handler(update: Update, context: GameStateContext) -> None:
     assert update.message.from_user is not None
 
     user_id = update.message.from_user.id
-    game: Game | None = context.bot_data.get_game_by_userid(user_id)
-
-    if game is not None:
-        queued_message = game.queued_message.pop(user_id)
-        if queued_message is not None:
-            await update.message.reply_text(queued_message)
-            return
+    delivered_count = await context.bot_data.outbox.flush(context.bot, user_id)
+    if delivered_count > 0:
+        return
 
     await update.message.reply_text(
         "Start playing by inviting the bot to a group and running a new game with /new!\n\nRespond to prompts by sending images or stickers directly!"
@@ -71,7 +83,13 @@ async def user_submission_handler(update: Update, context: GameStateContext) ->
 
     pil_image = None
     if update.message.sticker:
-        pil_image = await get_sticker_pil_image_from_message(update, context)
+        slot = game.get_active_slot_by_user_id(user_id)
+        pil_image = await get_sticker_pil_image_from_message(
+            update,
+            context,
+            slot.size if slot is not None else None,
+            slot.fit if slot is not None else "cover",
+        )
     if update.message.photo:
         pil_image = await get_picture_pil_image_from_message(update, context)
 
@@ -103,7 +121,14 @@ async def new_game_handler(update: Update, context: GameStateContext) -> None:
         await update.message.reply_text("Game already exists in this chat!")
         return
 
-    game = await Game.new(update.message, context.bot)
+    game = await Game.new(
+        update.message,
+        context.bot,
+        context.bot_data.outbox,
+        context.bot_data.groupchat_id_to_reveal_mode.get(
+            update.message.chat_id, settings.reveal_mode
+        ),
+    )
     context.bot_data.games[game.id] = game
     context.bot_data.groupchat_id_to_game[update.message.chat_id] = game.id
     context.bot_data.user_id_to_game[update.message.from_user.id] = game.id
@@ -137,21 +162,140 @@ async def join_game_handler(update: Update, context: GameStateContext) -> None:
         context.bot_data.user_id_to_game[update.message.from_user.id] = game.id
 
 
-def main() -> None:
+async def reveal_mode_handler(update: Update, context: GameStateContext) -> None:
+    assert update.message is not None
+
+    reveal_modes: tuple[RevealMode, ...] = get_args(RevealMode)
+    chat_id = update.message.chat_id
+
+    if not context.args or context.args[0] not in reveal_modes:
+        current_mode = context.bot_data.groupchat_id_to_reveal_mode.get(
+            chat_id, settings.reveal_mode
+        )
+        await update.message.reply_text(
+            f"Current reveal mode is {current_mode}. Change it with /reveal <{'|'.join(reveal_modes)}>"
+        )
+        return
+
+    assert update.message.from_user is not None
+    user_id = update.message.from_user.id
+    game: Game | None = context.bot_data.get_game_by_groupchat_id(chat_id)
+    is_game_creator = (
+        game is not None
+        and game.game_status != "FINISHED"
+        and game.game_creator.id == user_id
+    )
+    if not is_game_creator and not await context.is_user_admin_in_chat(
+        chat_id, user_id
+    ):
+        await update.message.reply_text(
+            "Only the game creator or chat admins can change the reveal mode!"
+        )
+        return
+
+    reveal_mode = next(mode for mode in reveal_modes if mode == context.args[0])
+    context.bot_data.groupchat_id_to_reveal_mode[chat_id] = reveal_mode
+
+    if game is not None:
+        game.reveal_mode = reveal_mode
+
+    await update.message.reply_text(
+        f"Reveal mode set to {reveal_mode} until the bot restarts!"
+    )
+
+
+async def leaderboard_handler(update: Update, context: GameStateContext) -> None:
+    assert update.message is not None
+
+    is_global = update.message.chat.type == constants.ChatType.PRIVATE or (
+        context.args is not None and "global" in context.args
+    )
+    # sqlite blocks, keep it off the event loop
+    entries = await asyncio.to_thread(
+        game_archive.get_leaderboard, None if is_global else update.message.chat_id
+    )
+    if len(entries) == 0:
+        await update.message.reply_text(
+            "No finished rounds yet, start a game with /new!"
+        )
+        return
+
+    title = "🏆 All-time leaderboard" if is_global else "🏆 Leaderboard of this chat"
+    if settings.score_results:
+        lines = [
+            f"{i + 1}. {entry.display_name}: {entry.points} points ({entry.rounds} rounds)"
+            for i, entry in enumerate(entries)
+        ]
+    else:
+        # without scoring every team gets 0 points, only rounds played rank
+        title += " by rounds played"
+        lines = [
+            f"{i + 1}. {entry.display_name}: {entry.rounds} rounds"
+            for i, entry in enumerate(entries)
+        ]
+    await update.message.reply_text(title + "\n\n" + "\n".join(lines))
+
+
+async def full_resolution_handler(update: Update, context: GameStateContext) -> None:
+    query = update.callback_query
+    assert query is not None
+    assert query.data is not None
+
+    if query.message is None or not await send_requested_full_resolution(
+        context.bot, query.message, query.data
+    ):
+        await query.answer("This image was already sent or is no longer available!")
+        return
+
+    await query.answer()
+
+
+async def my_chat_member_handler(update: Update, context: GameStateContext) -> None:
+    assert update.my_chat_member is not None
+
+    # keep the cached admin status in sync when the bot is promoted or demoted
+    context.bot_data.set_bot_admin_status(
+        update.my_chat_member.chat.id,
+        update.my_chat_member.new_chat_member.status in ADMIN_STATUSES,
+    )
+
+
+async def post_shutdown(application: Application) -> None:
+    shutdown_renderer()
+    game_archive.close()
+    await upload_cache.close()
+
+
+def build_application(request: BaseRequest | None = None) -> Application:
     context_types = ContextTypes(context=GameStateContext, bot_data=BotState)
     # persistence = PicklePersistence(filepath="data.pickle", context_types=context_types)
-    app = (
+    update_processor = GameOrderedUpdateProcessor(
+        settings.max_concurrent_updates, settings.max_pending_updates
+    )
+    builder = (
         ApplicationBuilder()
         .token(settings.bot_token)
         # .persistence(persistence)
         .context_types(context_types)
-        .build()
+        .concurrent_updates(update_processor)
+        .post_shutdown(post_shutdown)
     )
+    if request is not None:
+        builder = builder.request(request).get_updates_request(request)
+    app = builder.build()
+    update_processor.bot_state = app.bot_data
+
+    if settings.record_updates_path is not None:
+        recorder = UpdateRecorder(settings.record_updates_path)
+        # a group of its own before the handlers so every update gets recorded
+        app.add_handler(TypeHandler(Update, recorder.record), group=-1)
 
     app.add_handler(CommandHandler("start", start_handler, filters.ChatType.PRIVATE))
     app.add_handler(
         CommandHandler(
-            ["start", "new", "join"], warning_handler, ~filters.ChatType.SUPERGROUP
+            ["start", "new", "join", "reveal"],
+            warning_handler,
+            ~filters.ChatType.SUPERGROUP,
         )
     )
     app.add_handler(
@@ -163,10 +307,32 @@ def main() -> None:
     app.add_handler(
         CommandHandler("join", join_game_handler, filters=filters.ChatType.SUPERGROUP)
     )
+    app.add_handler(
+        CommandHandler(
+            "reveal", reveal_mode_handler, filters=filters.ChatType.SUPERGROUP
+        )
+    )
+    app.add_handler(CommandHandler("leaderboard", leaderboard_handler))
+    app.add_handler(
+        CallbackQueryHandler(
+            full_resolution_handler, pattern=f"^{FULL_RESOLUTION_CALLBACK_PREFIX}"
+        )
+    )
+    app.add_handler(
+        ChatMemberHandler(my_chat_member_handler, ChatMemberHandler.MY_CHAT_MEMBER)
+    )
     app.add_handler(
         MessageHandler(filters.Sticker.ALL | filters.PHOTO, user_submission_handler)
     )
 
+    return app
+
+
+def main() -> None:
+    prepare_template_cache()
+
+    app = build_application()
+
     if settings.env == "prod":
         if settings.listen is None or settings.port is None:
             raise ValueError("Listen and port must be set in production mode!")
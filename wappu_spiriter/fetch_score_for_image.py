@@ -1,9 +1,15 @@
 import base64
+from functools import cache
 from io import BytesIO
 from openai import OpenAI
 from PIL import Image
 
-client = OpenAI()
+
+@cache
+def get_client() -> OpenAI:
+    # created on first use so importing doesn't require OPENAI_API_KEY
+    return OpenAI()
+
 
 prompt = """
 How many points does this image get? End your answer with the "Total points: X" where X is the total number of points you have given.
@@ -24,7 +30,7 @@ def pil_image_to_base64_string(image: Image.Image) -> str:
 def fetch_score_for_image(base64_string: str) -> int:
     print("Calling OPENAI API")
 
-    response = client.chat.completions.create(
+    response = get_client().chat.completions.create(
         model="gpt-4-vision-preview",
         messages=[
             {
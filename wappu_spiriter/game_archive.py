@@ -0,0 +1,214 @@
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Tuple
+
+from wappu_spiriter.settings import settings
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    chat_id INTEGER NOT NULL,
+    status_message_id INTEGER NOT NULL,
+    seed INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    UNIQUE (chat_id, status_message_id)
+);
+CREATE TABLE IF NOT EXISTS rounds (
+    id INTEGER PRIMARY KEY,
+    game_id INTEGER NOT NULL REFERENCES games (id),
+    round_index INTEGER NOT NULL,
+    scenario_name TEXT NOT NULL,
+    instruction_set_index INTEGER NOT NULL,
+    finished_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS rounds_by_game ON rounds (game_id, round_index);
+CREATE TABLE IF NOT EXISTS teams (
+    id INTEGER PRIMARY KEY,
+    round_id INTEGER NOT NULL REFERENCES rounds (id),
+    team_index INTEGER NOT NULL,
+    file_id TEXT,
+    score INTEGER
+);
+CREATE INDEX IF NOT EXISTS teams_by_round ON teams (round_id);
+CREATE TABLE IF NOT EXISTS prompts (
+    team_id INTEGER NOT NULL REFERENCES teams (id),
+    user_id INTEGER NOT NULL,
+    prompt TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS prompts_by_team ON prompts (team_id);
+CREATE INDEX IF NOT EXISTS prompts_by_user ON prompts (user_id);
+CREATE TABLE IF NOT EXISTS chat_scores (
+    chat_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    display_name TEXT NOT NULL,
+    points INTEGER NOT NULL,
+    rounds INTEGER NOT NULL,
+    PRIMARY KEY (chat_id, user_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS chat_scores_by_points
+    ON chat_scores (chat_id, points DESC, rounds DESC);
+CREATE TABLE IF NOT EXISTS global_scores (
+    user_id INTEGER PRIMARY KEY,
+    display_name TEXT NOT NULL,
+    points INTEGER NOT NULL,
+    rounds INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS global_scores_by_points
+    ON global_scores (points DESC, rounds DESC);
+"""
+
+UPSERT_CHAT_SCORE = """
+INSERT INTO chat_scores (chat_id, user_id, display_name, points, rounds)
+VALUES (?, ?, ?, ?, 1)
+ON CONFLICT (chat_id, user_id) DO UPDATE SET
+    display_name = excluded.display_name,
+    points = points + excluded.points,
+    rounds = rounds + 1
+"""
+
+UPSERT_GLOBAL_SCORE = """
+INSERT INTO global_scores (user_id, display_name, points, rounds)
+VALUES (?, ?, ?, 1)
+ON CONFLICT (user_id) DO UPDATE SET
+    display_name = excluded.display_name,
+    points = points + excluded.points,
+    rounds = rounds + 1
+"""
+
+
+@dataclass(frozen=True, slots=True)
+class TeamRecord:
+    # user id and display name of every player
+    players: Tuple[Tuple[int, str], ...]
+    # user id and prompt of every slot handed out
+    prompts: Tuple[Tuple[int, str], ...]
+    file_id: str | None
+    score: int | None
+
+
+@dataclass(frozen=True, slots=True)
+class RoundRecord:
+    chat_id: int
+    status_message_id: int
+    seed: int
+    round_index: int
+    scenario_name: str
+    instruction_set_index: int
+    teams: Tuple[TeamRecord, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class LeaderboardEntry:
+    display_name: str
+    points: int
+    rounds: int
+
+
+class GameArchive:
+    """Append-only SQLite history of every finished round.
+
+    Player totals per chat and overall are kept up to date as rounds are
+    appended, so leaderboards are an index lookup instead of a scan of every
+    past game."""
+
+    def __init__(self, path: str | None) -> None:
+        self.path = path
+        self.connection: sqlite3.Connection | None = None
+        # rounds are appended from worker threads
+        self.lock = threading.Lock()
+
+    def connect(self) -> sqlite3.Connection:
+        assert self.path is not None
+
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode = WAL")
+            self.connection.executescript(SCHEMA)
+
+        return self.connection
+
+    def append_round(self, record: RoundRecord) -> None:
+        if self.path is None:
+            return
+
+        with self.lock, self.connect() as connection:
+            connection.execute(
+                "INSERT OR IGNORE INTO games (chat_id, status_message_id, seed, created_at) VALUES (?, ?, ?, ?)",
+                (record.chat_id, record.status_message_id, record.seed, time.time()),
+            )
+            (game_id,) = connection.execute(
+                "SELECT id FROM games WHERE chat_id = ? AND status_message_id = ?",
+                (record.chat_id, record.status_message_id),
+            ).fetchone()
+            round_id = connection.execute(
+                "INSERT INTO rounds (game_id, round_index, scenario_name, instruction_set_index, finished_at) VALUES (?, ?, ?, ?, ?)",
+                (
+                    game_id,
+                    record.round_index,
+                    record.scenario_name,
+                    record.instruction_set_index,
+                    time.time(),
+                ),
+            ).lastrowid
+
+            for team_index, team in enumerate(record.teams):
+                team_id = connection.execute(
+                    "INSERT INTO teams (round_id, team_index, file_id, score) VALUES (?, ?, ?, ?)",
+                    (round_id, team_index, team.file_id, team.score),
+                ).lastrowid
+                connection.executemany(
+                    "INSERT INTO prompts (team_id, user_id, prompt) VALUES (?, ?, ?)",
+                    [(team_id, user_id, prompt) for user_id, prompt in team.prompts],
+                )
+
+                points = team.score or 0
+                connection.executemany(
+                    UPSERT_CHAT_SCORE,
+                    [
+                        (record.chat_id, user_id, display_name, points)
+                        for user_id, display_name in team.players
+                    ],
+                )
+                connection.executemany(
+                    UPSERT_GLOBAL_SCORE,
+                    [
+                        (user_id, display_name, points)
+                        for user_id, display_name in team.players
+                    ],
+                )
+
+    def get_leaderboard(
+        self, chat_id: int | None, limit: int = 10
+    ) -> List[LeaderboardEntry]:
+        """Best players of a chat, or of every chat if `chat_id` is None."""
+        if self.path is None:
+            return []
+
+        with self.lock:
+            connection = self.connect()
+            if chat_id is None:
+                rows = connection.execute(
+                    "SELECT display_name, points, rounds FROM global_scores ORDER BY points DESC, rounds DESC LIMIT ?",
+                    (limit,),
+                ).fetchall()
+            else:
+                rows = connection.execute(
+                    "SELECT display_name, points, rounds FROM chat_scores WHERE chat_id = ? ORDER BY points DESC, rounds DESC LIMIT ?",
+                    (chat_id, limit),
+                ).fetchall()
+
+        return [LeaderboardEntry(*row) for row in rows]
+
+    def close(self) -> None:
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+
+game_archive = GameArchive(settings.game_archive_path)
@@ -1,8 +1,14 @@
+import time
 from typing import Dict, Optional
 
+from telegram import ChatMember
 from telegram.ext import Application, CallbackContext, ExtBot
 
 from wappu_spiriter.game_model import Game
+from wappu_spiriter.outbox import Outbox
+from wappu_spiriter.settings import RevealMode, settings
+
+ADMIN_STATUSES = (ChatMember.ADMINISTRATOR, ChatMember.OWNER)
 
 
 class BotState:
@@ -12,6 +18,32 @@ class BotState:
         self.user_id_to_game: dict[int, str] = dict()
         self.groupchat_id_to_game: dict[int, str] = dict()
 
+        self.outbox = Outbox()
+
+        # in memory only, chats fall back to settings.reveal_mode on restart
+        self.groupchat_id_to_reveal_mode: dict[int, RevealMode] = dict()
+
+        # groupchat id => (is bot admin, monotonic time of the lookup)
+        self.groupchat_id_to_bot_admin_status: dict[int, tuple[bool, float]] = dict()
+
+    def get_cached_bot_admin_status(self, groupchat_id: int) -> bool | None:
+        cached = self.groupchat_id_to_bot_admin_status.get(groupchat_id)
+        if cached is None:
+            return None
+
+        is_admin, fetched_at = cached
+        if time.monotonic() - fetched_at > settings.admin_status_cache_ttl:
+            del self.groupchat_id_to_bot_admin_status[groupchat_id]
+            return None
+
+        return is_admin
+
+    def set_bot_admin_status(self, groupchat_id: int, is_admin: bool) -> None:
+        self.groupchat_id_to_bot_admin_status[groupchat_id] = (
+            is_admin,
+            time.monotonic(),
+        )
+
     def exists_active_game_in_groupchat(self, groupchat_id: int) -> bool:
         if groupchat_id not in self.groupchat_id_to_game:
             return False
@@ -45,6 +77,16 @@ class GameStateContext(CallbackContext[ExtBot, dict, dict, BotState]):
         self._message_id: Optional[int] = None
 
     async def is_bot_is_admin_in_chat(self, chat_id: int) -> bool:
-        return self.bot.id in [
-            admin.user.id for admin in await self.bot.get_chat_administrators(chat_id)
-        ]
+        is_admin = self.bot_data.get_cached_bot_admin_status(chat_id)
+        if is_admin is not None:
+            return is_admin
+
+        bot_member = await self.bot.get_chat_member(chat_id, self.bot.id)
+        is_admin = bot_member.status in ADMIN_STATUSES
+        self.bot_data.set_bot_admin_status(chat_id, is_admin)
+
+        return is_admin
+
+    async def is_user_admin_in_chat(self, chat_id: int, user_id: int) -> bool:
+        member = await self.bot.get_chat_member(chat_id, user_id)
+        return member.status in ADMIN_STATUSES
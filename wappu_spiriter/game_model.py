@@ -1,20 +1,61 @@
 import asyncio
+import base64
+import bisect
 import itertools
+import logging
+import math
 import random
-from dataclasses import dataclass, field
-from typing import List, Literal, Self
+import sqlite3
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from typing import Awaitable, List, Literal, Self, Sequence, Tuple
 
 from more_itertools import first_true, flatten
 from PIL.Image import Image
-from telegram import Message, User, constants, error
+from telegram import (
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    InputMediaDocument,
+    MaybeInaccessibleMessage,
+    Message,
+    ReplyParameters,
+    User,
+    constants,
+    error,
+)
 from telegram.ext import ExtBot
 
-from wappu_spiriter.image_related.utils import pil_image_to_bytes
+from wappu_spiriter.fetch_score_for_image import fetch_score_for_image
+from wappu_spiriter.game_archive import RoundRecord, TeamRecord, game_archive
+from wappu_spiriter.outbox import Outbox
+from wappu_spiriter.render import get_renderer
 from wappu_spiriter.scenario_definitions.scenario_model import (
     Scenario,
     Slot,
     scenario_definitions,
 )
+from wappu_spiriter.settings import RevealMode, settings
+from wappu_spiriter.team_formation import assign_slots, form_teams
+from wappu_spiriter.update_processor import worker_slot_released
+from wappu_spiriter.upload_cache import upload_cache
+
+# telegram allows at most 10 photos in one media group
+MEDIA_GROUP_MAX_SIZE = 10
+
+logger = logging.getLogger(__name__)
+
+# process wide counter, so ids can't collide in BotState.games
+game_ids = itertools.count(1)
+# rounds being scored and archived in the background
+archive_tasks: set[asyncio.Task] = set()
+
+FULL_RESOLUTION_CALLBACK_PREFIX = "full:"
+FULL_RESOLUTION_BUTTONS_PER_ROW = 3
+FULL_RESOLUTION_LABEL = "🔍 Full resolution"
+full_resolution_ids = itertools.count(1)
+# full resolution renders and filenames offered with a button, oldest first
+requestable_full_resolutions: OrderedDict[str, Tuple[bytes, str]] = OrderedDict()
 
 
 @dataclass
@@ -29,6 +70,86 @@ class Team:
     scenario: Scenario
 
 
+@dataclass(slots=True)
+class RevealedTeam:
+    # file_id of the composite shown in the group, the collage in collage mode
+    file_id: str | None
+    # the team's own preview, None in collage mode
+    preview: bytes | None
+
+
+@dataclass
+class PreparedRound:
+    """A round's scenarios and slot assignments, made before the round starts."""
+
+    scenario_index: int
+    team_scenarios: List[Scenario]
+    player_slots: dict[int, List[Slot]]
+
+
+def split_media_groups(count: int) -> List[range]:
+    """Split `count` items into as few media groups as fit, evenly sized.
+
+    Telegram needs 2-10 items per group, balancing keeps e.g. 11 items from
+    leaving one behind. Only a single item ends up alone."""
+    group_count = math.ceil(count / MEDIA_GROUP_MAX_SIZE)
+    return [
+        range(count * i // group_count, count * (i + 1) // group_count)
+        for i in range(group_count)
+    ]
+
+
+def offer_full_resolution(
+    label: str, full: bytes, filename: str
+) -> InlineKeyboardButton:
+    """A button sending `full` as a file, kept only for the latest requests."""
+    key = str(next(full_resolution_ids))
+    requestable_full_resolutions[key] = (full, filename)
+    while len(requestable_full_resolutions) > settings.requestable_full_resolutions:
+        requestable_full_resolutions.popitem(last=False)
+
+    return InlineKeyboardButton(
+        label, callback_data=FULL_RESOLUTION_CALLBACK_PREFIX + key
+    )
+
+
+async def send_requested_full_resolution(
+    bot: ExtBot, message: MaybeInaccessibleMessage, callback_data: str
+) -> bool:
+    """Send the file behind a pressed button once and remove the button."""
+    requested = requestable_full_resolutions.pop(
+        callback_data.removeprefix(FULL_RESOLUTION_CALLBACK_PREFIX), None
+    )
+    if requested is None:
+        return False
+
+    full, filename = requested
+    await bot.send_document(
+        message.chat.id,
+        full,
+        filename=filename,
+        reply_parameters=ReplyParameters(message.message_id),
+    )
+
+    if isinstance(message, Message) and message.reply_markup is not None:
+        rows = [
+            [button for button in row if button.callback_data != callback_data]
+            for row in message.reply_markup.inline_keyboard
+        ]
+        rows = [row for row in rows if len(row) > 0]
+        await bot.edit_message_reply_markup(
+            message.chat.id,
+            message.message_id,
+            reply_markup=InlineKeyboardMarkup(rows) if len(rows) > 0 else None,
+        )
+
+    return True
+
+
+def get_photo_file_id(message: Message) -> str | None:
+    return message.photo[-1].file_id if message.photo else None
+
+
 def get_user_display_name(user: User | None) -> str:
     if user is None:
         return "Unknown user"
@@ -47,6 +168,38 @@ def get_user_mention(user: User | None) -> str:
     return f"[{display_name}](tg://user?id={user.id})"
 
 
+def get_game_seed(init_call_msg: Message) -> int:
+    # derived from the /new message so replaying an update stream with the same
+    # base seed recreates the same games
+    return random.Random(
+        f"{settings.game_seed}:{init_call_msg.chat_id}:{init_call_msg.message_id}"
+    ).getrandbits(64)
+
+
+async def score_result(preview: bytes | None) -> int | None:
+    if preview is None or not settings.score_results:
+        return None
+
+    try:
+        return await asyncio.to_thread(
+            fetch_score_for_image, base64.b64encode(preview).decode()
+        )
+    except Exception as e:
+        logger.warning("Could not score result: %s", e)
+        return None
+
+
+async def archive_round(record: RoundRecord, previews: List[bytes | None]) -> None:
+    scores = await asyncio.gather(*(score_result(preview) for preview in previews))
+    teams = tuple(
+        replace(team, score=score) for team, score in zip(record.teams, scores)
+    )
+    try:
+        await asyncio.to_thread(game_archive.append_round, replace(record, teams=teams))
+    except sqlite3.Error as e:
+        logger.warning("Could not archive round of chat %s: %s", record.chat_id, e)
+
+
 def get_mentions_list(users: List[User | None]) -> str:
     user_mentions = [get_user_mention(player) for player in users]
     user_mentions.sort()
@@ -67,19 +220,38 @@ class Game:
     scenarios: List[Scenario]
     current_scenario_index: int = 0
     rounds: int = 3
-    queued_message: dict[int, str] = {}
+    outbox: Outbox
+    reveal_mode: RevealMode = settings.reveal_mode
+    seed: int
+    rng: random.Random
+    # sorted player mentions, kept up to date on join instead of re-sorting
+    player_mentions: List[str]
+    status_message_outdated: bool = False
+    status_message_edit_task: asyncio.Task | None = None
+    status_message_edited_at: float = 0
 
     @classmethod
-    async def new(cls, init_call_msg: Message, bot: ExtBot) -> Self:
+    async def new(
+        cls,
+        init_call_msg: Message,
+        bot: ExtBot,
+        outbox: Outbox,
+        reveal_mode: RevealMode = settings.reveal_mode,
+    ) -> Self:
         assert init_call_msg.from_user is not None
 
         self = cls()
+        self.outbox = outbox
+        self.reveal_mode = reveal_mode
 
-        self.id = str(random.randint(0, 1000000))
+        self.id = str(next(game_ids))
+        self.seed = get_game_seed(init_call_msg)
+        self.rng = random.Random(self.seed)
 
         self.game_chat_id = init_call_msg.chat_id
         self.player_ids = set([init_call_msg.from_user.id])
         self.player_ids_to_user[init_call_msg.from_user.id] = init_call_msg.from_user
+        self.player_mentions = [get_user_mention(init_call_msg.from_user)]
 
         self.bot_username = bot.username
         self.game_creator = init_call_msg.from_user
@@ -113,8 +285,7 @@ class Game:
 
     @property
     def pretty_player_list(self) -> str:
-        player_list = [self.player_ids_to_user.get(pid) for pid in self.player_ids]
-        return get_mentions_list(player_list)
+        return "\n".join(self.player_mentions)
 
     @property
     def pretty_team_list(self) -> str:
@@ -147,6 +318,8 @@ class Game:
 
 🕹️ Commands:
 /join \\- join game
+/reveal \\- choose how results are revealed \\(game creator or admins\\)
+/leaderboard \\- show the best players of this chat
 /start \\- start game \\({get_user_mention(self.game_creator)} only\\)"""
 
             case "ACTIVE":
@@ -172,38 +345,296 @@ class Game:
         return first_empty_slot
 
     async def finish_round(self, bot: ExtBot):
+        # made before the reveal so the next round starts the moment it ends
+        prepared_round = self.prepare_round(self.current_scenario_index + 1)
+
         result_msg = await bot.send_message(
             self.game_chat_id, "✅ Round finished!\n\n✨ Here are the team submissions:"
         )
         for player in self.players:
-            await bot.send_message(
+            await self.outbox.send(
+                bot,
                 player.id,
                 f"✅ Round finished\\!\n\n[✨ View results ➡️➡️➡️](https://t.me/c/{str(self.game_chat_id)[3:]}/{result_msg.id})",  # todo: substringing like that doesn't work in public groups
                 parse_mode=constants.ParseMode.MARKDOWN_V2,
             )
 
-        for i, team in enumerate(self.teams):
-            image = team.scenario.compose_image()
-            image_bytes = pil_image_to_bytes(image)
-            photo_message = await bot.send_photo(
-                self.game_chat_id,
-                image_bytes,
-                f'🖼️ "{self.current_scenario.scenario_definition.name}" by Team {i + 1} (continuing in 10 s...)',
+        match self.reveal_mode:
+            case "sequential":
+                revealed = await self.reveal_sequentially(bot, self.teams)
+            case "album":
+                revealed = await self.reveal_as_album(bot, self.teams)
+            case "collage":
+                revealed = await self.reveal_as_collage(bot, self.teams)
+
+        # scoring calls out to the OpenAI API, so it doesn't hold up the game
+        task = asyncio.create_task(
+            archive_round(
+                self.get_round_record(revealed),
+                [team.preview for team in revealed],
             )
-            await photo_message.set_reaction("🔥")
-            await asyncio.sleep(10)
+        )
+        archive_tasks.add(task)
+        task.add_done_callback(archive_tasks.discard)
 
         await bot.send_message(
             self.game_chat_id,
             "✅ All submissions for the round revealed!",
         )
 
-        await self.next_round(bot)
+        await self.next_round(bot, prepared_round)
+
+    def get_round_record(self, revealed: List[RevealedTeam]) -> RoundRecord:
+        assert self.initalization_msg is not None
+
+        return RoundRecord(
+            chat_id=self.game_chat_id,
+            status_message_id=self.initalization_msg.id,
+            seed=self.seed,
+            round_index=self.current_scenario_index,
+            scenario_name=self.current_scenario.scenario_definition.name,
+            instruction_set_index=self.current_scenario.instruction_set_index,
+            teams=tuple(
+                TeamRecord(
+                    players=tuple(
+                        (
+                            player.id,
+                            get_user_display_name(
+                                self.player_ids_to_user.get(player.id)
+                            ),
+                        )
+                        for player in team.players
+                    ),
+                    prompts=tuple(
+                        (player.id, slot.prompt)
+                        for player in team.players
+                        for slot in player.slots
+                    ),
+                    file_id=revealed_team.file_id,
+                    score=None,
+                )
+                for team, revealed_team in zip(self.teams, revealed)
+            ),
+        )
+
+    def get_result_filename(self, team_index: int) -> str:
+        return f"{self.current_scenario.scenario_definition.name} - Team {team_index + 1}.jpg"
+
+    async def send_full_resolution(
+        self, bot: ExtBot, preview_message: Message, full: bytes, filename: str
+    ) -> None:
+        if not settings.send_full_resolution:
+            return
+
+        await bot.send_document(
+            self.game_chat_id,
+            full,
+            filename=filename,
+            reply_parameters=ReplyParameters(preview_message.id),
+        )
+
+    def get_full_resolution_markup(
+        self, files: Sequence[Tuple[str, bytes, str]]
+    ) -> InlineKeyboardMarkup | None:
+        """Buttons for the labelled full resolution files, unless they are sent
+        anyway."""
+        if settings.send_full_resolution:
+            return None
+
+        buttons = [
+            offer_full_resolution(label, full, filename)
+            for label, full, filename in files
+        ]
+        return InlineKeyboardMarkup(
+            [
+                buttons[i : i + FULL_RESOLUTION_BUTTONS_PER_ROW]
+                for i in range(0, len(buttons), FULL_RESOLUTION_BUTTONS_PER_ROW)
+            ]
+        )
+
+    async def send_preview(
+        self, bot: ExtBot, user_id: int, preview: bytes, caption: str
+    ) -> None:
+        if not self.outbox.is_reachable(user_id):
+            return
+
+        try:
+            # the group reveal already uploaded the preview, this reuses its file_id
+            await upload_cache.send_photo(bot, user_id, preview, caption, persist=False)
+        except error.Forbidden:
+            self.outbox.unreachable_user_ids.add(user_id)
+        except (error.NetworkError, error.RetryAfter) as e:
+            logger.warning("Could not send preview to user %s: %s", user_id, e)
+
+    async def send_preview_to_players(
+        self, bot: ExtBot, players: List[Player], preview: bytes
+    ) -> None:
+        if not settings.send_previews_to_players:
+            return
+
+        caption = f'🖼️ Your team\'s "{self.current_scenario.scenario_definition.name}"'
+        await asyncio.gather(
+            *(self.send_preview(bot, player.id, preview, caption) for player in players)
+        )
+
+    async def reveal_sequentially(
+        self, bot: ExtBot, teams: List[Team]
+    ) -> List[RevealedTeam]:
+        revealed: List[RevealedTeam] = []
+        renderer = get_renderer()
+        # render every team at once, the first reveal only waits for its own
+        renders = [
+            asyncio.ensure_future(renderer.render(team.scenario)) for team in teams
+        ]
+        for i, (team, render) in enumerate(zip(teams, renders)):
+            rendered = await render
+            photo_message = await upload_cache.send_photo(
+                bot,
+                self.game_chat_id,
+                rendered.preview,
+                f'🖼️ "{self.current_scenario.scenario_definition.name}" by Team {i + 1} (continuing in {settings.reveal_delay:g} s...)',
+                persist=False,
+                reply_markup=self.get_full_resolution_markup(
+                    [
+                        (
+                            FULL_RESOLUTION_LABEL,
+                            rendered.full,
+                            self.get_result_filename(i),
+                        )
+                    ]
+                ),
+            )
+            await photo_message.set_reaction("🔥")
+            revealed.append(
+                RevealedTeam(get_photo_file_id(photo_message), rendered.preview)
+            )
+            await asyncio.gather(
+                self.send_full_resolution(
+                    bot, photo_message, rendered.full, self.get_result_filename(i)
+                ),
+                self.send_preview_to_players(bot, team.players, rendered.preview),
+            )
+            # pacing only, other games' updates can use the worker meanwhile
+            async with worker_slot_released():
+                await asyncio.sleep(settings.reveal_delay)
+
+        return revealed
+
+    async def reveal_as_album(
+        self, bot: ExtBot, teams: List[Team]
+    ) -> List[RevealedTeam]:
+        renderer = get_renderer()
+        scenario_name = self.current_scenario.scenario_definition.name
+        rendered_images = await asyncio.gather(
+            *(renderer.render(team.scenario) for team in teams)
+        )
+        previews: List[tuple[bytes, str | None]] = [
+            (rendered.preview, f'🖼️ "{scenario_name}" by Team {i + 1}')
+            for i, rendered in enumerate(rendered_images)
+        ]
+        full_resolution_files = [
+            InputMediaDocument(rendered.full, filename=self.get_result_filename(i))
+            for i, rendered in enumerate(rendered_images)
+        ]
+        file_ids: List[str | None] = []
+        for group in split_media_groups(len(previews)):
+            if len(group) == 1:
+                # a media group needs at least 2 items
+                (i,) = group
+                messages: Sequence[Message] = [
+                    await upload_cache.send_photo(
+                        bot,
+                        self.game_chat_id,
+                        *previews[i],
+                        persist=False,
+                        reply_markup=self.get_full_resolution_markup(
+                            [
+                                (
+                                    FULL_RESOLUTION_LABEL,
+                                    rendered_images[i].full,
+                                    self.get_result_filename(i),
+                                )
+                            ]
+                        ),
+                    )
+                ]
+            else:
+                messages = await upload_cache.send_media_group(
+                    bot, self.game_chat_id, [previews[i] for i in group], persist=False
+                )
+                # media groups can't have buttons, they go in a message of their own
+                reply_markup = self.get_full_resolution_markup(
+                    [
+                        (
+                            f"Team {i + 1}",
+                            rendered_images[i].full,
+                            self.get_result_filename(i),
+                        )
+                        for i in group
+                    ]
+                )
+                if reply_markup is not None:
+                    await bot.send_message(
+                        self.game_chat_id,
+                        FULL_RESOLUTION_LABEL,
+                        reply_markup=reply_markup,
+                    )
+            file_ids += [get_photo_file_id(message) for message in messages]
+
+            if not settings.send_full_resolution:
+                continue
+            if len(group) == 1:
+                await bot.send_document(
+                    self.game_chat_id,
+                    rendered_images[i].full,
+                    filename=self.get_result_filename(i),
+                )
+            else:
+                await bot.send_media_group(
+                    self.game_chat_id, [full_resolution_files[i] for i in group]
+                )
+
+        await asyncio.gather(
+            *(
+                self.send_preview_to_players(bot, team.players, rendered.preview)
+                for team, rendered in zip(teams, rendered_images)
+            )
+        )
+
+        return [
+            RevealedTeam(file_id, rendered.preview)
+            for file_id, rendered in zip(file_ids, rendered_images)
+        ]
+
+    async def reveal_as_collage(
+        self, bot: ExtBot, teams: List[Team]
+    ) -> List[RevealedTeam]:
+        rendered = await get_renderer().render_collage(
+            [team.scenario for team in teams]
+        )
+        filename = f"{self.current_scenario.scenario_definition.name}.jpg"
+        photo_message = await upload_cache.send_photo(
+            bot,
+            self.game_chat_id,
+            rendered.preview,
+            f'🖼️ "{self.current_scenario.scenario_definition.name}" by Teams 1-{len(teams)} (left to right, top to bottom)',
+            persist=False,
+            reply_markup=self.get_full_resolution_markup(
+                [(FULL_RESOLUTION_LABEL, rendered.full, filename)]
+            ),
+        )
+        await photo_message.set_reaction("🔥")
+        await asyncio.gather(
+            self.send_full_resolution(bot, photo_message, rendered.full, filename),
+            self.send_preview_to_players(bot, self.players, rendered.preview),
+        )
 
-    async def next_round(self, bot: ExtBot):
-        self.current_scenario_index += 1
+        file_id = get_photo_file_id(photo_message)
+        return [RevealedTeam(file_id, None) for _ in teams]
 
-        if self.current_scenario_index >= len(self.scenarios):
+    async def next_round(self, bot: ExtBot, prepared_round: PreparedRound | None):
+        if prepared_round is None:
+            self.current_scenario_index += 1
             self.game_status = "FINISHED"
             await bot.send_message(
                 self.game_chat_id,
@@ -212,17 +643,14 @@ class Game:
             )
             return
 
-        for player in self.players:
-            player.slots = []
-
-        for team in self.teams:
-            team.scenario = self.scenarios[self.current_scenario_index].clone()
-            await self.assign_initial_prompts_to_team(team, bot)
-
-        await bot.send_message(
-            self.game_chat_id,
-            f"✅ Next round started\\!\n\n[🖌️ Play game ➡️➡️➡️](https://t.me/{bot.username})",
-            parse_mode=constants.ParseMode.MARKDOWN_V2,
+        await self.start_round(
+            bot,
+            prepared_round,
+            bot.send_message(
+                self.game_chat_id,
+                f"✅ Next round started\\!\n\n[🖌️ Play game ➡️➡️➡️](https://t.me/{bot.username})",
+                parse_mode=constants.ParseMode.MARKDOWN_V2,
+            ),
         )
 
     async def submit_image(
@@ -235,24 +663,40 @@ class Game:
             await message.reply_text(done_msg)
             return
 
+        # teams bigger than their scenario share slots, the first image fills one
+        sharing_user_ids = [
+            player.id
+            for player in self.players
+            if player.id != user_id
+            and self.get_active_slot_by_user_id(player.id) is next_slot
+        ]
         next_slot.submitted_image = image
         is_instruction_sent = await self.send_next_instruction(bot, user_id)
 
         if not is_instruction_sent:
             await message.reply_text(done_msg)
 
+        await asyncio.gather(
+            *(
+                self.send_slot_filled(bot, sharing_user_id, next_slot.prompt)
+                for sharing_user_id in sharing_user_ids
+            )
+        )
+
         if self.empty_slots == 0:
             await self.finish_round(bot)
 
-    async def send_instruction(self, bot: ExtBot, user_id: int, prompt: str) -> None:
-        try:
-            await bot.send_message(user_id, prompt)
-        except error.Forbidden as e:
-            if e.message == "Forbidden: bot can't initiate conversation with a user":
-                self.queued_message[user_id] = prompt
-                return
+    async def send_slot_filled(self, bot: ExtBot, user_id: int, prompt: str) -> None:
+        await self.send_instruction(
+            bot, user_id, f'🤝 A teammate already sent "{prompt}"!'
+        )
+        if not await self.send_next_instruction(bot, user_id):
+            await self.send_instruction(
+                bot, user_id, "You are finished for the round, wait for others!"
+            )
 
-            raise e
+    async def send_instruction(self, bot: ExtBot, user_id: int, prompt: str) -> None:
+        await self.outbox.send(bot, user_id, prompt)
 
     async def send_next_instruction(self, bot: ExtBot, user_id: int) -> bool:
         active_slot = self.get_active_slot_by_user_id(user_id)
@@ -269,9 +713,9 @@ class Game:
 
     def populate_scenarios(self):
         scenario_definitions_shuffled = scenario_definitions.copy()
-        random.shuffle(scenario_definitions_shuffled)
+        self.rng.shuffle(scenario_definitions_shuffled)
         self.scenarios = [
-            Scenario(scenario_definition)
+            Scenario(scenario_definition, rng=self.rng)
             for scenario_definition in scenario_definitions_shuffled
         ]
 
@@ -287,78 +731,66 @@ class Game:
         self.populate_scenarios()
         self.current_scenario_index = 0
 
-        # todo: change to 4 for max slot count??
-        max_team_size = 3
-
-        # team logic
-        # 1 => 1
-        # 2 => 1 + 1
-        # 3 => 1 + 1 + 1
-
-        # 4 => 2 + 2
-        # 5 => 3 + 2
-        # 6 => 2 + 2 + 2
-        # 7 => 3 + 2 + 2
-        # 8 => 2 + 2 + 2 + 2
-        # 9 => 3 + 2 + 2 + 2
-        # 10 => 2 + 2 + 2 + 2 + 2
-
-        # split into teams
-        if len(self.player_ids) <= max_team_size:
-            # single player teams
-            self.teams = [
-                Team(
-                    players=[Player(id=i)],
-                    scenario=self.scenarios[self.current_scenario_index].clone(),
-                )
-                for i in self.player_ids
-            ]
-        else:
-            # pairs of 2 or leftover fills a 3 group
-            self.teams = []
-
-            player_pool = list(self.player_ids.copy())
-            random.shuffle(player_pool)
-
-            team_count = len(player_pool) // 2
-            for _ in range(team_count):
-                team_players = [
-                    Player(id=player_pool.pop()),
-                    Player(id=player_pool.pop()),
-                ]
-                self.teams += [
-                    Team(
-                        players=team_players,
-                        scenario=self.scenarios[self.current_scenario_index].clone(),
-                    ),
-                ]
-
-            if len(player_pool) > 0:
-                self.teams[0].players += [Player(id=player_pool.pop())]
+        self.teams = [
+            Team(
+                players=[Player(id=player_id) for player_id in team_player_ids],
+                scenario=self.scenarios[self.current_scenario_index],
+            )
+            for team_player_ids in form_teams(
+                self.player_ids, settings.max_teams_per_round, self.rng
+            )
+        ]
 
         self.game_status = "ACTIVE"
 
-        await bot.edit_message_text(
-            self.status_message,
-            self.game_chat_id,
-            self.initalization_msg.id,
-            parse_mode=constants.ParseMode.MARKDOWN_V2,
-        )
+        if self.status_message_edit_task is not None:
+            self.status_message_edit_task.cancel()
+        await self.edit_status_message(bot)
 
+        prepared_round = self.prepare_round(0)
+        assert prepared_round is not None
+        await self.start_round(bot, prepared_round)
+
+    def prepare_round(self, scenario_index: int) -> PreparedRound | None:
+        """Clone the scenario for every team and hand out its slots.
+
+        Touches nothing the current round uses, so it can run during the reveal."""
+        if scenario_index >= len(self.scenarios):
+            return None
+
+        team_scenarios = []
+        player_slots: dict[int, List[Slot]] = {player.id: [] for player in self.players}
         for team in self.teams:
-            await self.assign_initial_prompts_to_team(team, bot)
-
-    async def assign_initial_prompts_to_team(self, team: Team, bot: ExtBot):
-        slots = team.scenario.slots
-        random.shuffle(slots)
-        for slot, player in zip(slots, itertools.cycle(team.players)):
-            if len(player.slots) == 0:
-                await self.send_instruction(
+            scenario = self.scenarios[scenario_index].clone()
+            self.rng.shuffle(scenario.slots)
+            for slot, player in assign_slots(scenario.slots, team.players):
+                player_slots[player.id].append(slot)
+            team_scenarios.append(scenario)
+
+        return PreparedRound(scenario_index, team_scenarios, player_slots)
+
+    async def start_round(
+        self, bot: ExtBot, prepared_round: PreparedRound, *announcements: Awaitable
+    ) -> None:
+        self.current_scenario_index = prepared_round.scenario_index
+        for team, scenario in zip(self.teams, prepared_round.team_scenarios):
+            team.scenario = scenario
+        for player in self.players:
+            player.slots = prepared_round.player_slots[player.id]
+
+        # every first prompt goes out at once instead of one player at a time
+        await asyncio.gather(
+            *announcements,
+            *(
+                self.send_instruction(
                     bot,
                     player.id,
-                    f'📨 Please send me a sticker or image of\n\n"{slot.prompt}"',
+                    f'📨 Please send me a sticker or image of\n\n"{player.slots[0].prompt}"',
                 )
-            player.slots += [slot]
+                for player in self.players
+                if len(player.slots) > 0
+            ),
+        )
 
     # return exception object if non-terminal error
     async def join_game(
@@ -381,7 +813,17 @@ class Game:
 
         self.player_ids.add(join_call_msg.from_user.id)
         self.player_ids_to_user[join_call_msg.from_user.id] = join_call_msg.from_user
+        bisect.insort(self.player_mentions, get_user_mention(join_call_msg.from_user))
 
+        self.schedule_status_message_edit(bot)
+
+        return None
+
+    async def edit_status_message(self, bot: ExtBot) -> None:
+        assert self.initalization_msg is not None
+
+        self.status_message_outdated = False
+        self.status_message_edited_at = time.monotonic()
         await bot.edit_message_text(
             self.status_message,
             self.game_chat_id,
@@ -389,4 +831,28 @@ class Game:
             parse_mode=constants.ParseMode.MARKDOWN_V2,
         )
 
-        return None
+    def schedule_status_message_edit(self, bot: ExtBot) -> None:
+        # coalesce edits, at most one per interval showing the latest state
+        self.status_message_outdated = True
+        if (
+            self.status_message_edit_task is None
+            or self.status_message_edit_task.done()
+        ):
+            self.status_message_edit_task = asyncio.create_task(
+                self.flush_status_message_edits(bot)
+            )
+
+    async def flush_status_message_edits(self, bot: ExtBot) -> None:
+        while self.status_message_outdated:
+            delay = (
+                self.status_message_edited_at
+                + settings.status_message_edit_interval
+                - time.monotonic()
+            )
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            try:
+                await self.edit_status_message(bot)
+            except error.TelegramError as e:
+                logger.warning("Could not edit status message: %s", e)
@@ -0,0 +1,61 @@
+"""Compare resampling tiers for every scenario slot.
+
+Run with `poe bench`, a 12 MP JPEG is scaled into each slot and the time and
+mean pixel difference to the LANCZOS result are printed per tier."""
+
+import io
+import time
+from typing import Tuple
+
+from PIL import Image, ImageChops, ImageStat
+
+from wappu_spiriter.image_related.resampling import ResamplingTier, resize_image
+from wappu_spiriter.scenario_definitions.scenario_model import scenario_definitions
+
+SAMPLE_IMAGE_PATH = "tests/celebration-image.jpg"
+SAMPLE_IMAGE_SIZE = (4000, 3000)
+
+
+def make_sample_jpeg(size: Tuple[int, int] = SAMPLE_IMAGE_SIZE) -> bytes:
+    with Image.open(SAMPLE_IMAGE_PATH) as image:
+        sample = image.convert("RGB").resize(size, Image.Resampling.BICUBIC)
+
+    sample_bytes = io.BytesIO()
+    sample.save(sample_bytes, format="JPEG", quality=90)
+    return sample_bytes.getvalue()
+
+
+def mean_difference(a: Image.Image, b: Image.Image) -> float:
+    diff = ImageChops.difference(a.convert("RGB"), b.convert("RGB"))
+    return sum(ImageStat.Stat(diff).mean) / 3
+
+
+def time_resize(
+    sample: bytes, size: Tuple[int, int], tier: ResamplingTier
+) -> Tuple[float, Image.Image]:
+    # decoding is part of the work since the fast tier skips some of it
+    start = time.perf_counter()
+    image = resize_image(Image.open(io.BytesIO(sample)), size, tier)
+    image.load()
+    return time.perf_counter() - start, image
+
+
+def main() -> None:
+    sample = make_sample_jpeg()
+
+    print(f"{'scenario':<36} {'slot':>10} {'quality':>10} {'fast':>10} {'diff':>6}")
+    for scenario_definition in scenario_definitions:
+        for slot in scenario_definition.slot_list:
+            quality_time, quality_image = time_resize(sample, slot["size"], "quality")
+            fast_time, fast_image = time_resize(sample, slot["size"], "fast")
+            size = "x".join(str(x) for x in slot["size"])
+
+            print(
+                f"{scenario_definition.name:<36} {size:>10}"
+                f" {quality_time * 1000:>8.1f}ms {fast_time * 1000:>8.1f}ms"
+                f" {mean_difference(quality_image, fast_image):>6.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
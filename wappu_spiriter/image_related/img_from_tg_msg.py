@@ -1,9 +1,23 @@
+import asyncio
 import io
+import logging
+from typing import Tuple
 
 from PIL import Image
-from telegram import Update
+from telegram import Sticker, Update
 
 from wappu_spiriter.game_context import GameStateContext
+from wappu_spiriter.image_related.manipulate_img import FitMode
+from wappu_spiriter.image_related.sticker_frames import (
+    can_decode_webm,
+    can_render_tgs,
+    decode_webm_frame,
+    get_frame_size,
+    render_tgs_frame,
+    sticker_frame_cache,
+)
+
+logger = logging.getLogger(__name__)
 
 
 async def get_picture_pil_image_from_message(
@@ -21,14 +35,54 @@ async def get_picture_pil_image_from_message(
     return pil_image
 
 
+async def get_animated_sticker_frame(
+    sticker: Sticker,
+    context: GameStateContext,
+    slot_size: Tuple[int, int],
+    fit: FitMode,
+) -> Image.Image | None:
+    if sticker.is_animated and not can_render_tgs():
+        return None
+    if sticker.is_video and not can_decode_webm():
+        return None
+
+    size = get_frame_size((sticker.width, sticker.height), slot_size, fit)
+    frame = sticker_frame_cache.get(sticker.file_unique_id, size)
+    if frame is not None:
+        return frame
+
+    sticker_file = await context.bot.get_file(sticker)
+    sticker_bytes = bytes(await sticker_file.download_as_bytearray())
+    decode = render_tgs_frame if sticker.is_animated else decode_webm_frame
+    try:
+        frame = await asyncio.to_thread(decode, sticker_bytes, size)
+    except Exception as e:
+        logger.warning(
+            "Could not decode animated sticker %s: %s", sticker.file_unique_id, e
+        )
+        return None
+
+    sticker_frame_cache.set(sticker.file_unique_id, size, frame)
+    return frame
+
+
 async def get_sticker_pil_image_from_message(
-    update: Update, context: GameStateContext
+    update: Update,
+    context: GameStateContext,
+    slot_size: Tuple[int, int] | None = None,
+    fit: FitMode = "cover",
 ) -> Image.Image | None:
     assert update.message and update.message.sticker
 
     sticker = update.message.sticker
 
-    # for animated sticker, we use the thumbnail as the img
+    # render animated stickers' first frame at the size the slot will show it
+    if (sticker.is_animated or sticker.is_video) and slot_size is not None:
+        frame = await get_animated_sticker_frame(sticker, context, slot_size, fit)
+        if frame is not None:
+            return frame
+
+    # otherwise for animated sticker, we use the thumbnail as the img
     if sticker.is_animated or sticker.is_video:
         if sticker.thumbnail is None:
             print("Animated sticker has no thumbnail to use as the img")
@@ -1,21 +1,165 @@
-from typing import Tuple
+import math
+from functools import cache
+from typing import List, Literal, Tuple
 
 from PIL import Image
 
+from wappu_spiriter.image_related.resampling import Box, ResamplingTier, resize_image
+from wappu_spiriter.image_related.template_cache import get_mapped_template
 
-def overlay_pil_image_on_base_image(
-    base_image: Image.Image,
+FitMode = Literal["cover", "contain", "stretch"]
+
+# alpha carrying modes that Image.paste accepts directly as a mask
+PASTE_MASK_MODES = ("RGBA", "RGBa", "LA", "La")
+ALPHA_MODES = ("RGBA", "RGBa", "LA", "La", "PA")
+
+
+def has_alpha(image: Image.Image) -> bool:
+    return image.mode in ALPHA_MODES or "transparency" in image.info
+
+
+def get_fit(
+    source_size: Tuple[int, int], slot_size: Tuple[int, int], fit: FitMode
+) -> Tuple[Box, Tuple[int, int], Tuple[int, int]]:
+    """Return the source crop box, the scaled size and its offset in the slot.
+
+    Only needs the source dimensions, so it can run before the image is decoded.
+    """
+    source_width, source_height = source_size
+    slot_width, slot_height = slot_size
+    full_box: Box = (0, 0, source_width, source_height)
+
+    if fit == "stretch":
+        return full_box, slot_size, (0, 0)
+
+    if fit == "contain":
+        scale = min(slot_width / source_width, slot_height / source_height)
+        size = (
+            max(1, round(source_width * scale)),
+            max(1, round(source_height * scale)),
+        )
+        offset = ((slot_width - size[0]) // 2, (slot_height - size[1]) // 2)
+        return full_box, size, offset
+
+    # cover, crop the centre of the source to the slot's aspect ratio
+    scale = max(slot_width / source_width, slot_height / source_height)
+    crop_width = slot_width / scale
+    crop_height = slot_height / scale
+    left = (source_width - crop_width) / 2
+    top = (source_height - crop_height) / 2
+    return (left, top, left + crop_width, top + crop_height), slot_size, (0, 0)
+
+
+def prepare_overlay(
+    overlay_image: Image.Image,
+    slot_size: Tuple[int, int],
+    resampling: ResamplingTier = "auto",
+    fit: FitMode = "stretch",
+) -> Tuple[Image.Image, Image.Image | None, Tuple[int, int]]:
+    """Fit an overlay into `slot_size`, returns it with its paste mask and offset.
+
+    The crop and the scaling happen in a single resize. Opaque inputs get no
+    mask at all, and images already at the target size are not resized."""
+    overlay = overlay_image
+    mask: Image.Image | None = None
+    box, size, offset = get_fit(overlay.size, slot_size, fit)
+
+    if has_alpha(overlay):
+        if overlay.mode not in PASTE_MASK_MODES or "transparency" in overlay.info:
+            overlay = overlay.convert("RGBA")
+        mask = overlay
+
+    if overlay.size != size or box != (0, 0, *overlay.size):
+        overlay = resize_image(overlay, size, resampling, box)
+        if mask is not None:
+            mask = overlay
+
+    return overlay, mask, offset
+
+
+def paste_overlay(
+    canvas: Image.Image,
     overlay_image: Image.Image,
     target_coordinates: Tuple[Tuple[int, int], Tuple[int, int]],
-) -> Image.Image:
-    scaled_overlay = overlay_image.resize(
+    resampling: ResamplingTier = "auto",
+    fit: FitMode = "stretch",
+) -> None:
+    """Paste `overlay_image` onto `canvas` in place."""
+    scaled_overlay, mask, offset = prepare_overlay(
+        overlay_image,
         (
             target_coordinates[1][0] - target_coordinates[0][0],
             target_coordinates[1][1] - target_coordinates[0][1],
-        )
+        ),
+        resampling,
+        fit,
     )
-    copied_base_image = base_image.copy()
-    copied_base_image.paste(
-        scaled_overlay, target_coordinates[0], scaled_overlay.convert("RGBA")
+    canvas.paste(
+        scaled_overlay,
+        (target_coordinates[0][0] + offset[0], target_coordinates[0][1] + offset[1]),
+        mask,
     )
+
+
+def overlay_pil_image_on_base_image(
+    base_image: Image.Image,
+    overlay_image: Image.Image,
+    target_coordinates: Tuple[Tuple[int, int], Tuple[int, int]],
+    resampling: ResamplingTier = "auto",
+    fit: FitMode = "stretch",
+) -> Image.Image:
+    copied_base_image = base_image.copy()
+    paste_overlay(copied_base_image, overlay_image, target_coordinates, resampling, fit)
     return copied_base_image
+
+
+@cache
+def load_template_layer(path: str, dimensions: Tuple[int, int]) -> Image.Image:
+    """Load a full-canvas template image once as a ready-to-composite RGBA layer.
+
+    The returned image is shared, copy it before pasting onto it."""
+    mapped_template = get_mapped_template(path, dimensions)
+    if mapped_template is not None:
+        return mapped_template
+
+    with Image.open(path) as image:
+        layer = image.convert("RGBA")
+
+    if layer.size != dimensions:
+        layer = layer.resize(dimensions, Image.Resampling.LANCZOS)
+
+    return layer
+
+
+def get_collage_columns(image_count: int) -> int:
+    return math.ceil(math.sqrt(image_count))
+
+
+def make_collage(
+    images: List[Image.Image],
+    width: int,
+    resampling: ResamplingTier = "auto",
+) -> Image.Image:
+    """Tile downscaled `images` left to right, top to bottom into one image."""
+    assert len(images) > 0
+
+    columns = get_collage_columns(len(images))
+    rows = math.ceil(len(images) / columns)
+    tile_width = width // columns
+    tile_height = round(tile_width * images[0].height / images[0].width)
+
+    collage = Image.new("RGB", (tile_width * columns, tile_height * rows), "white")
+    for i, image in enumerate(images):
+        row, column = divmod(i, columns)
+        paste_overlay(
+            collage,
+            image,
+            (
+                (column * tile_width, row * tile_height),
+                ((column + 1) * tile_width, (row + 1) * tile_height),
+            ),
+            resampling,
+            "contain",
+        )
+
+    return collage
@@ -0,0 +1,114 @@
+import io
+import math
+from typing import Literal, Tuple
+
+from PIL import Image
+
+ResamplingTier = Literal["auto", "fast", "quality"]
+Box = Tuple[float, float, float, float]
+
+# downscaling by at least this factor uses the fast tier in "auto" mode, area
+# averaging is visually indistinguishable from LANCZOS at such ratios
+FAST_TIER_MIN_DOWNSCALE_FACTOR = 3.0
+
+
+def get_downscale_factor(
+    source_size: Tuple[float, float], size: Tuple[int, int]
+) -> float:
+    return min(source_size[0] / size[0], source_size[1] / size[1])
+
+
+def choose_resampling_tier(
+    source_size: Tuple[float, float],
+    size: Tuple[int, int],
+    tier: ResamplingTier = "auto",
+) -> Literal["fast", "quality"]:
+    if tier != "auto":
+        return tier
+
+    if get_downscale_factor(source_size, size) >= FAST_TIER_MIN_DOWNSCALE_FACTOR:
+        return "fast"
+
+    return "quality"
+
+
+def scale_box(box: Box, scale: float, offset: Tuple[int, int] = (0, 0)) -> Box:
+    return (
+        (box[0] - offset[0]) / scale,
+        (box[1] - offset[1]) / scale,
+        (box[2] - offset[0]) / scale,
+        (box[3] - offset[1]) / scale,
+    )
+
+
+def open_drafted(image: Image.Image, size: Tuple[int, int]) -> Image.Image | None:
+    """A fresh copy of a not yet decoded JPEG `image` that decodes at a reduced
+    scale still at least `size`, None if the decoder can't skip any detail.
+
+    draft() changes how an image decodes, so it's never applied to `image`
+    itself."""
+    if image.format != "JPEG" or not getattr(image, "tile", None):
+        return None
+
+    fp = getattr(image, "fp", None)
+    if isinstance(fp, io.BytesIO):
+        drafted = Image.open(io.BytesIO(fp.getvalue()))
+    elif getattr(image, "filename", None):
+        drafted = Image.open(getattr(image, "filename"))
+    else:
+        return None
+
+    if drafted.draft(None, size) is None:
+        return None
+
+    return drafted
+
+
+def resize_image(
+    image: Image.Image,
+    size: Tuple[int, int],
+    tier: ResamplingTier = "auto",
+    box: Box | None = None,
+) -> Image.Image:
+    """Resize the `box` region (defaults to the whole image) of `image` to `size`.
+
+    The fast tier lets the JPEG decoder skip detail with draft mode on a copy
+    of `image`, shrinks the region with an integer reduce() and finishes with a
+    BOX filter. `image` itself is left as it was."""
+    if box is None:
+        box = (0, 0, image.size[0], image.size[1])
+
+    box_size = (box[2] - box[0], box[3] - box[1])
+    tier = choose_resampling_tier(box_size, size, tier)
+
+    if tier == "fast":
+        downscale_factor = get_downscale_factor(box_size, size)
+        drafted = open_drafted(
+            image,
+            (
+                math.ceil(image.size[0] / downscale_factor),
+                math.ceil(image.size[1] / downscale_factor),
+            ),
+        )
+        if drafted is not None:
+            box = scale_box(box, image.size[0] / drafted.size[0])
+            image = drafted
+
+    if image.mode in ("1", "P"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+    if tier == "quality":
+        return image.resize(size, Image.Resampling.LANCZOS, box)
+
+    reduce_factor = int(get_downscale_factor((box[2] - box[0], box[3] - box[1]), size))
+    if reduce_factor >= 2:
+        reduce_box = (
+            int(box[0]) // reduce_factor * reduce_factor,
+            int(box[1]) // reduce_factor * reduce_factor,
+            min(image.size[0], math.ceil(box[2] / reduce_factor) * reduce_factor),
+            min(image.size[1], math.ceil(box[3] / reduce_factor) * reduce_factor),
+        )
+        image = image.reduce(reduce_factor, reduce_box)
+        box = scale_box(box, reduce_factor, (reduce_box[0], reduce_box[1]))
+
+    return image.resize(size, Image.Resampling.BOX, box)
@@ -0,0 +1,106 @@
+import gzip
+import importlib
+import io
+from collections import OrderedDict
+from types import ModuleType
+from typing import Tuple
+
+from PIL import Image
+
+from wappu_spiriter.image_related.manipulate_img import FitMode, get_fit
+from wappu_spiriter.settings import settings
+
+
+def import_optional(name: str) -> ModuleType | None:
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+
+# both are optional, animated stickers fall back to their thumbnail without them
+rlottie_python = import_optional("rlottie_python")
+av = import_optional("av")
+
+# only libvpx decodes the alpha channel of telegram's VP9 video stickers
+WEBM_DECODER = "libvpx-vp9"
+
+FrameKey = Tuple[str, Tuple[int, int]]
+
+
+def get_frame_size(
+    source_size: Tuple[int, int], slot_size: Tuple[int, int], fit: FitMode
+) -> Tuple[int, int]:
+    """Size of the whole frame so that fitting it into the slot needs no scaling."""
+    box, size, _ = get_fit(source_size, slot_size, fit)
+    scale_x = size[0] / (box[2] - box[0])
+    scale_y = size[1] / (box[3] - box[1])
+    return (
+        max(1, round(source_size[0] * scale_x)),
+        max(1, round(source_size[1] * scale_y)),
+    )
+
+
+def can_render_tgs() -> bool:
+    return rlottie_python is not None
+
+
+def can_decode_webm() -> bool:
+    return av is not None
+
+
+def render_tgs_frame(data: bytes, size: Tuple[int, int]) -> Image.Image:
+    """Render the first frame of a gzipped Lottie animation as vectors at `size`."""
+    assert rlottie_python is not None
+
+    animation = rlottie_python.LottieAnimation.from_data(gzip.decompress(data).decode())
+    try:
+        return animation.render_pillow_frame(0, width=size[0], height=size[1])
+    finally:
+        animation.lottie_animation_destroy()
+
+
+def decode_webm_frame(data: bytes, size: Tuple[int, int]) -> Image.Image:
+    """Decode only the first frame of a WEBM video, scaled to `size`."""
+    assert av is not None
+
+    with av.open(io.BytesIO(data)) as container:
+        stream = container.streams.video[0]
+        try:
+            decoder = av.CodecContext.create(WEBM_DECODER, "r")
+        except ValueError:
+            # VP8 or a build without libvpx, decoded without alpha
+            decoder = stream.codec_context
+
+        for packet in container.demux(stream):
+            for frame in decoder.decode(packet):
+                rgba = frame.reformat(size[0], size[1], format="rgba")
+                return Image.fromarray(rgba.to_ndarray(), "RGBA")
+
+    raise ValueError("Video sticker has no frames")
+
+
+class StickerFrameCache:
+    """Decoded sticker frames by file_unique_id and size, least recently used out.
+
+    Popular animated stickers are then only downloaded and decoded once."""
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self.frames: OrderedDict[FrameKey, Image.Image] = OrderedDict()
+
+    def get(self, file_unique_id: str, size: Tuple[int, int]) -> Image.Image | None:
+        frame = self.frames.get((file_unique_id, size))
+        if frame is not None:
+            self.frames.move_to_end((file_unique_id, size))
+
+        return frame
+
+    def set(self, file_unique_id: str, size: Tuple[int, int], frame: Image.Image):
+        self.frames[(file_unique_id, size)] = frame
+        self.frames.move_to_end((file_unique_id, size))
+        while len(self.frames) > self.max_size:
+            self.frames.popitem(last=False)
+
+
+sticker_frame_cache = StickerFrameCache(settings.sticker_frame_cache_size)
@@ -0,0 +1,147 @@
+import json
+import logging
+import mmap
+import os
+import struct
+from typing import Dict, Iterable, Tuple
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# file layout: little endian u64 header length, json header, then the raw RGBA
+# pixels of every template, each starting at an aligned offset
+HEADER_LENGTH_FORMAT = "<Q"
+DATA_ALIGNMENT = 4096
+TEMPLATE_MODE = "RGBA"
+
+Template = Tuple[str, Tuple[int, int]]
+
+mapped_templates: Dict[Template, Image.Image] = dict()
+mapped_file: mmap.mmap | None = None
+
+
+def align(offset: int) -> int:
+    return -(-offset // DATA_ALIGNMENT) * DATA_ALIGNMENT
+
+
+def get_source_stamp(path: str) -> list[int]:
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def get_data_start(header_length: int) -> int:
+    return align(struct.calcsize(HEADER_LENGTH_FORMAT) + header_length)
+
+
+def read_header(cache_path: str) -> Tuple[dict, int] | None:
+    """Return the header and the offset where pixel data starts."""
+    try:
+        with open(cache_path, "rb") as f:
+            header_length_bytes = f.read(struct.calcsize(HEADER_LENGTH_FORMAT))
+            (header_length,) = struct.unpack(HEADER_LENGTH_FORMAT, header_length_bytes)
+            return json.loads(f.read(header_length)), get_data_start(header_length)
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def is_up_to_date(
+    header: Tuple[dict, int] | None, templates: Dict[Template, list[int]]
+) -> bool:
+    if header is None:
+        return False
+
+    cached = {
+        (entry["path"], tuple(entry["size"])): entry["source"]
+        for entry in header[0]["templates"]
+    }
+    return cached == templates
+
+
+def build_template_cache(cache_path: str, templates: Iterable[Template]) -> None:
+    """Decode templates once into a raw pixel file that processes can mmap.
+
+    Does nothing if the file is already up to date with the template files."""
+    sources: Dict[Template, list[int]] = dict()
+    for template in templates:
+        try:
+            sources[template] = get_source_stamp(template[0])
+        except OSError as e:
+            logger.warning("Skipping missing template %s: %s", template[0], e)
+
+    if is_up_to_date(read_header(cache_path), sources):
+        return
+
+    offsets: Dict[Template, int] = dict()
+    data_length = 0
+    for path, size in sources:
+        offsets[(path, size)] = data_length
+        data_length = align(data_length + size[0] * size[1] * len(TEMPLATE_MODE))
+
+    entries = [
+        {
+            "path": path,
+            "size": list(size),
+            "source": source,
+            "offset": offsets[(path, size)],
+        }
+        for (path, size), source in sources.items()
+    ]
+    header = json.dumps({"templates": entries}).encode()
+    data_start = get_data_start(len(header))
+
+    temp_path = f"{cache_path}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(struct.pack(HEADER_LENGTH_FORMAT, len(header)))
+        f.write(header)
+        for (path, size), offset in offsets.items():
+            with Image.open(path) as image:
+                layer = image.convert(TEMPLATE_MODE)
+            if layer.size != size:
+                layer = layer.resize(size, Image.Resampling.LANCZOS)
+
+            f.seek(data_start + offset)
+            f.write(layer.tobytes())
+        f.truncate(data_start + data_length)
+    os.replace(temp_path, cache_path)
+
+    logger.info("Built template cache %s with %s templates", cache_path, len(entries))
+
+
+def map_template_cache(cache_path: str) -> bool:
+    """Map the template cache read-only, templates then share its pages.
+
+    Returns False if there is no cache to map."""
+    global mapped_file
+
+    header = read_header(cache_path)
+    if header is None:
+        return False
+    header_data, data_start = header
+
+    with open(cache_path, "rb") as f:
+        mapped_file = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    buffer = memoryview(mapped_file)
+
+    mapped_templates.clear()
+    for entry in header_data["templates"]:
+        size = (entry["size"][0], entry["size"][1])
+        start = data_start + entry["offset"]
+        length = size[0] * size[1] * len(TEMPLATE_MODE)
+        # frombuffer wraps the mapped pages without copying, the image is read-only
+        mapped_templates[(entry["path"], size)] = Image.frombuffer(
+            TEMPLATE_MODE,
+            size,
+            buffer[start : start + length],
+            "raw",
+            TEMPLATE_MODE,
+            0,
+            1,
+        )
+
+    return True
+
+
+def get_mapped_template(path: str, size: Tuple[int, int]) -> Image.Image | None:
+    return mapped_templates.get((path, size))
@@ -8,8 +8,13 @@ def show_pil_image(image: Image.Image) -> None:
     plt.show()
 
 
-def pil_image_to_bytes(image: Image.Image) -> bytes:
+def pil_image_to_bytes(
+    image: Image.Image, format: str = "WEBP", quality: int = 80
+) -> bytes:
+    if format == "JPEG" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
     image_bytes = BytesIO()
-    image.save(image_bytes, format="WEBP")
+    image.save(image_bytes, format=format, quality=quality)
     image_bytes.seek(0)
     return image_bytes.getvalue()
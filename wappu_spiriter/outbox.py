@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, List
+
+from telegram import constants, error
+from telegram.ext import ExtBot
+
+from wappu_spiriter.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class PendingMessage:
+    text: str
+    expires_at: float
+    parse_mode: str | None = None
+
+
+def batch_pending_messages(
+    messages: List[PendingMessage],
+) -> List[List[PendingMessage]]:
+    """Group consecutive messages with the same parse mode into single sends."""
+    batches: List[List[PendingMessage]] = []
+    batch_length = 0
+
+    for message in messages:
+        if (
+            len(batches) > 0
+            and batches[-1][0].parse_mode == message.parse_mode
+            and batch_length + 2 + len(message.text)
+            <= constants.MessageLimit.MAX_TEXT_LENGTH
+        ):
+            batches[-1].append(message)
+            batch_length += 2 + len(message.text)
+            continue
+
+        batches.append([message])
+        batch_length = len(message.text)
+
+    return batches
+
+
+class Outbox:
+    """Direct messages to players, held back for users the bot can't reach.
+
+    Telegram doesn't let bots message users who haven't started them, so those
+    messages wait here in order until the user sends /start or a background
+    retry with backoff gets through. Users known to be unreachable don't cost a
+    failing send_message call per message."""
+
+    def __init__(self) -> None:
+        self.pending_messages: dict[int, Deque[PendingMessage]] = dict()
+        self.unreachable_user_ids: set[int] = set()
+        self.retry_tasks: dict[int, asyncio.Task] = dict()
+
+    def is_reachable(self, user_id: int) -> bool:
+        return user_id not in self.unreachable_user_ids
+
+    def enqueue(self, user_id: int, text: str, parse_mode: str | None) -> None:
+        self.pending_messages.setdefault(user_id, deque()).append(
+            PendingMessage(
+                text=text,
+                expires_at=time.monotonic() + settings.outbox_message_ttl,
+                parse_mode=parse_mode,
+            )
+        )
+
+    def pop_pending(self, user_id: int) -> List[PendingMessage]:
+        now = time.monotonic()
+        messages = self.pending_messages.pop(user_id, deque())
+        return [message for message in messages if message.expires_at > now]
+
+    def has_pending(self, user_id: int) -> bool:
+        now = time.monotonic()
+        messages = self.pending_messages.get(user_id)
+        if messages is None:
+            return False
+
+        while len(messages) > 0 and messages[0].expires_at <= now:
+            messages.popleft()
+        if len(messages) == 0:
+            del self.pending_messages[user_id]
+            return False
+
+        return True
+
+    async def send(
+        self, bot: ExtBot, user_id: int, text: str, parse_mode: str | None = None
+    ) -> bool:
+        """Send now if possible, otherwise queue. Returns whether it was sent."""
+        if not self.is_reachable(user_id) or self.has_pending(user_id):
+            # keep the message behind the ones already waiting
+            self.enqueue(user_id, text, parse_mode)
+            self.schedule_retry(bot, user_id)
+            return False
+
+        try:
+            await bot.send_message(user_id, text, parse_mode=parse_mode)
+            return True
+        except error.Forbidden:
+            self.unreachable_user_ids.add(user_id)
+        except (error.NetworkError, error.RetryAfter) as e:
+            logger.warning("Could not message user %s, retrying later: %s", user_id, e)
+
+        self.enqueue(user_id, text, parse_mode)
+        self.schedule_retry(bot, user_id)
+        return False
+
+    async def flush(self, bot: ExtBot, user_id: int) -> int:
+        """Deliver everything pending for a user that just started the bot."""
+        self.unreachable_user_ids.discard(user_id)
+        return await self.deliver_pending(bot, user_id)
+
+    async def deliver_pending(self, bot: ExtBot, user_id: int) -> int:
+        batches = batch_pending_messages(self.pop_pending(user_id))
+
+        for i, batch in enumerate(batches):
+            try:
+                await bot.send_message(
+                    user_id,
+                    "\n\n".join(message.text for message in batch),
+                    parse_mode=batch[0].parse_mode,
+                )
+            except (error.Forbidden, error.NetworkError, error.RetryAfter) as e:
+                if isinstance(e, error.Forbidden):
+                    self.unreachable_user_ids.add(user_id)
+
+                remaining = [message for pending in batches[i:] for message in pending]
+                self.pending_messages.setdefault(user_id, deque()).extendleft(
+                    reversed(remaining)
+                )
+                return i
+
+            self.unreachable_user_ids.discard(user_id)
+
+        return len(batches)
+
+    def schedule_retry(self, bot: ExtBot, user_id: int) -> None:
+        task = self.retry_tasks.get(user_id)
+        if task is None or task.done():
+            self.retry_tasks[user_id] = asyncio.create_task(
+                self.retry_delivery(bot, user_id)
+            )
+
+    async def retry_delivery(self, bot: ExtBot, user_id: int) -> None:
+        delay = settings.outbox_retry_initial_delay
+
+        while self.has_pending(user_id):
+            await asyncio.sleep(delay)
+            await self.deliver_pending(bot, user_id)
+            delay = min(delay * 2, settings.outbox_retry_max_delay)
+
+        self.retry_tasks.pop(user_id, None)
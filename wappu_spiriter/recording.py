@@ -0,0 +1,62 @@
+import json
+import time
+from dataclasses import dataclass, field
+from typing import IO, Any, List
+
+from telegram import Update
+
+from wappu_spiriter.game_context import GameStateContext
+from wappu_spiriter.settings import settings
+
+
+@dataclass
+class RecordedSession:
+    game_seed: int
+    updates: List[dict[str, Any]] = field(default_factory=list)
+
+
+class UpdateRecorder:
+    """Appends every incoming update to a jsonl file for offline replay.
+
+    Each bot run starts a new session line with the game seed, so replaying a
+    session recreates the same games."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.file: IO[str] | None = None
+        self.started_at = time.monotonic()
+
+    def write_line(self, data: dict[str, Any]) -> None:
+        if self.file is None:
+            self.file = open(self.path, "a")
+            self.write_line({"session": {"game_seed": settings.game_seed}})
+
+        self.file.write(json.dumps(data) + "\n")
+        self.file.flush()
+
+    async def record(self, update: object, context: GameStateContext) -> None:
+        if not isinstance(update, Update):
+            return
+
+        self.write_line(
+            {"time": time.monotonic() - self.started_at, "update": update.to_dict()}
+        )
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def load_recording(path: str) -> List[RecordedSession]:
+    sessions: List[RecordedSession] = []
+
+    with open(path) as f:
+        for line in f:
+            data = json.loads(line)
+            if "session" in data:
+                sessions.append(RecordedSession(data["session"]["game_seed"]))
+            elif len(sessions) > 0:
+                sessions[-1].updates.append(data["update"])
+
+    return sessions
@@ -0,0 +1,332 @@
+import asyncio
+import io
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+from typing import List, Tuple
+
+from PIL import Image
+
+from wappu_spiriter.image_related.manipulate_img import (
+    FitMode,
+    get_collage_columns,
+    load_template_layer,
+    make_collage,
+)
+from wappu_spiriter.image_related.resampling import ResamplingTier, resize_image
+from wappu_spiriter.image_related.template_cache import (
+    build_template_cache,
+    map_template_cache,
+)
+from wappu_spiriter.image_related.utils import pil_image_to_bytes
+from wappu_spiriter.scenario_definitions.scenario_model import (
+    Scenario,
+    Slot,
+    get_all_templates,
+    scenario_definitions,
+)
+from wappu_spiriter.settings import settings
+
+logger = logging.getLogger(__name__)
+
+COLLAGE_WIDTH = 3508
+
+
+FULL_RESOLUTION_QUALITY = 95
+# modes whose raw bytes fully describe the image, others (palette, 1 bit,
+# 16 bit) are converted before sharing
+RAW_SHAREABLE_MODES = ("RGB", "RGBA", "L", "LA")
+
+
+@dataclass(frozen=True, slots=True)
+class RenderedImage:
+    """A composed image encoded at full resolution and as a small preview."""
+
+    full: bytes
+    preview: bytes
+
+
+def get_preview_size(size: Tuple[int, int], max_size: int) -> Tuple[int, int]:
+    scale = max_size / max(size)
+    if scale >= 1:
+        return size
+
+    return (max(1, round(size[0] * scale)), max(1, round(size[1] * scale)))
+
+
+def encode_rendered_image(
+    image: Image.Image, resampling: ResamplingTier, preview_max_size: int
+) -> RenderedImage:
+    # both come from the same canvas, the preview only costs a downscale
+    preview = resize_image(
+        image, get_preview_size(image.size, preview_max_size), resampling
+    )
+    return RenderedImage(
+        full=pil_image_to_bytes(image, "JPEG", FULL_RESOLUTION_QUALITY),
+        preview=pil_image_to_bytes(preview, "JPEG"),
+    )
+
+
+def render_scenario(
+    scenario: Scenario, resampling: ResamplingTier, preview_max_size: int
+) -> RenderedImage:
+    return encode_rendered_image(
+        scenario.compose_image(resampling), resampling, preview_max_size
+    )
+
+
+def render_collage(
+    scenarios: List[Scenario], resampling: ResamplingTier, preview_max_size: int
+) -> RenderedImage:
+    images = [scenario.compose_image(resampling) for scenario in scenarios]
+    # every tile gets about the size of a single team's preview
+    return encode_rendered_image(
+        make_collage(images, COLLAGE_WIDTH, resampling),
+        resampling,
+        preview_max_size * get_collage_columns(len(images)),
+    )
+
+
+class LocalRenderer:
+    """Renders in a thread of this process, PIL releases the GIL for most work."""
+
+    async def render(self, scenario: Scenario) -> RenderedImage:
+        return await asyncio.to_thread(
+            render_scenario,
+            scenario,
+            settings.resampling_tier,
+            settings.preview_max_size,
+        )
+
+    async def render_collage(self, scenarios: List[Scenario]) -> RenderedImage:
+        return await asyncio.to_thread(
+            render_collage,
+            scenarios,
+            settings.resampling_tier,
+            settings.preview_max_size,
+        )
+
+    def shutdown(self) -> None:
+        pass
+
+
+@dataclass(frozen=True, slots=True)
+class SharedImage:
+    """An image in a shared memory block, either encoded or as raw pixels."""
+
+    shared_memory_name: str
+    length: int
+    # None when the block holds the encoded file as submitted
+    mode: str | None
+    size: Tuple[int, int]
+
+
+@dataclass(frozen=True, slots=True)
+class SlotJob:
+    position: Tuple[int, int]
+    size: Tuple[int, int]
+    fit: FitMode
+    image: SharedImage
+
+
+@dataclass(frozen=True, slots=True)
+class ScenarioJob:
+    scenario_name: str
+    slots: Tuple[SlotJob, ...]
+
+
+def get_encoded_bytes(image: Image.Image) -> bytes | None:
+    # images opened from a download keep their in-memory file around
+    fp = getattr(image, "fp", None)
+    if isinstance(fp, io.BytesIO):
+        return fp.getvalue()
+
+    return None
+
+
+def share_image(image: Image.Image) -> Tuple[SharedImage, SharedMemory]:
+    data = get_encoded_bytes(image)
+    mode = None
+    if data is None:
+        if image.mode not in RAW_SHAREABLE_MODES:
+            # a palette would be lost, tobytes only has its indices
+            image = image.convert("RGBA")
+        data = image.tobytes()
+        mode = image.mode
+
+    shared_memory = SharedMemory(create=True, size=max(1, len(data)))
+    shared_memory.buf[: len(data)] = data
+
+    return SharedImage(shared_memory.name, len(data), mode, image.size), shared_memory
+
+
+def read_shared_image(shared_image: SharedImage) -> Image.Image:
+    shared_memory = SharedMemory(shared_image.shared_memory_name)
+    data = shared_memory.buf[: shared_image.length]
+    try:
+        if shared_image.mode is None:
+            return Image.open(io.BytesIO(bytes(data)))
+
+        # frombytes copies, so the block can be closed right away
+        return Image.frombytes(shared_image.mode, shared_image.size, data)
+    finally:
+        data.release()
+        shared_memory.close()
+
+
+def release_shared_memories(shared_memories: List[SharedMemory]) -> None:
+    for shared_memory in shared_memories:
+        shared_memory.close()
+        shared_memory.unlink()
+
+
+def warm_template_cache() -> None:
+    # the mapped cache shares template memory with the other processes, only
+    # decode privately if it hasn't been built
+    if settings.template_cache_path is not None and map_template_cache(
+        settings.template_cache_path
+    ):
+        return
+
+    for path, dimensions in get_all_templates():
+        try:
+            load_template_layer(path, dimensions)
+        except OSError as e:
+            logger.warning("Could not preload template %s: %s", path, e)
+
+
+def prepare_template_cache() -> None:
+    if settings.template_cache_path is None:
+        return
+
+    build_template_cache(settings.template_cache_path, get_all_templates())
+    map_template_cache(settings.template_cache_path)
+
+
+def scenario_from_job(job: ScenarioJob) -> Scenario:
+    scenario_definition = next(
+        definition
+        for definition in scenario_definitions
+        if definition.name == job.scenario_name
+    )
+    scenario = Scenario(scenario_definition, 0)
+    scenario.slots = [
+        Slot(
+            position=slot.position,
+            size=slot.size,
+            prompt="",
+            fit=slot.fit,
+            submitted_image=read_shared_image(slot.image),
+        )
+        for slot in job.slots
+    ]
+    return scenario
+
+
+def render_scenario_job(
+    job: ScenarioJob, resampling: ResamplingTier, preview_max_size: int
+) -> RenderedImage:
+    return render_scenario(scenario_from_job(job), resampling, preview_max_size)
+
+
+def render_collage_job(
+    jobs: List[ScenarioJob], resampling: ResamplingTier, preview_max_size: int
+) -> RenderedImage:
+    return render_collage(
+        [scenario_from_job(job) for job in jobs], resampling, preview_max_size
+    )
+
+
+class ProcessPoolRenderer:
+    """Renders in worker processes so compositing can use every core.
+
+    Workers preload the templates once at startup. Submitted images are handed
+    over in shared memory blocks instead of pickling PIL images."""
+
+    def __init__(self, workers: int) -> None:
+        self.executor = ProcessPoolExecutor(
+            workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=warm_template_cache,
+        )
+
+    def share_scenarios(
+        self, scenarios: List[Scenario]
+    ) -> Tuple[List[ScenarioJob], List[SharedMemory]]:
+        jobs: List[ScenarioJob] = []
+        shared_memories: List[SharedMemory] = []
+
+        try:
+            for scenario in scenarios:
+                slots = []
+                for slot in scenario.slots:
+                    assert slot.submitted_image is not None
+                    shared_image, shared_memory = share_image(slot.submitted_image)
+                    shared_memories.append(shared_memory)
+                    slots.append(
+                        SlotJob(slot.position, slot.size, slot.fit, shared_image)
+                    )
+                jobs.append(
+                    ScenarioJob(scenario.scenario_definition.name, tuple(slots))
+                )
+        except BaseException:
+            release_shared_memories(shared_memories)
+            raise
+
+        return jobs, shared_memories
+
+    async def render(self, scenario: Scenario) -> RenderedImage:
+        jobs, shared_memories = self.share_scenarios([scenario])
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.executor,
+                render_scenario_job,
+                jobs[0],
+                settings.resampling_tier,
+                settings.preview_max_size,
+            )
+        finally:
+            release_shared_memories(shared_memories)
+
+    async def render_collage(self, scenarios: List[Scenario]) -> RenderedImage:
+        jobs, shared_memories = self.share_scenarios(scenarios)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.executor,
+                render_collage_job,
+                jobs,
+                settings.resampling_tier,
+                settings.preview_max_size,
+            )
+        finally:
+            release_shared_memories(shared_memories)
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(cancel_futures=True)
+
+
+def create_renderer() -> LocalRenderer | ProcessPoolRenderer:
+    if settings.render_workers > 0:
+        return ProcessPoolRenderer(settings.render_workers)
+
+    return LocalRenderer()
+
+
+renderer: LocalRenderer | ProcessPoolRenderer | None = None
+
+
+def get_renderer() -> LocalRenderer | ProcessPoolRenderer:
+    # created on first use so worker processes importing this module don't
+    # start pools of their own
+    global renderer
+    if renderer is None:
+        renderer = create_renderer()
+
+    return renderer
+
+
+def shutdown_renderer() -> None:
+    if renderer is not None:
+        renderer.shutdown()
@@ -0,0 +1,243 @@
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import io
+import itertools
+import json
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Iterator, List, Tuple
+
+from PIL import Image
+from telegram import Update
+from telegram.request import BaseRequest, RequestData
+
+from wappu_spiriter.bot import build_application
+from wappu_spiriter.game_archive import game_archive
+from wappu_spiriter.recording import RecordedSession, load_recording
+from wappu_spiriter.settings import settings
+from wappu_spiriter.upload_cache import upload_cache
+
+FAKE_BOT_USER = {
+    "id": 1,
+    "is_bot": True,
+    "first_name": "Wappu Spiriter",
+    "username": "wappu_spiriter_bot",
+}
+# size of downloads whose file_id wasn't seen in any update
+DEFAULT_FILE_SIZE = (512, 512)
+
+
+def make_fake_file(file_id: str, size: Tuple[int, int]) -> bytes:
+    # a deterministic colour per file so renders are reproducible
+    color = tuple(hashlib.sha256(file_id.encode()).digest()[:3])
+    output = io.BytesIO()
+    Image.new("RGB", size, color).save(output, "JPEG")
+    return output.getvalue()
+
+
+def find_file_sizes(data: Any, file_sizes: dict[str, Tuple[int, int]]) -> None:
+    """Collect the dimensions of every photo and sticker in an update."""
+    if isinstance(data, dict):
+        if "file_id" in data and "width" in data and "height" in data:
+            file_sizes[data["file_id"]] = (data["width"], data["height"])
+        for value in data.values():
+            find_file_sizes(value, file_sizes)
+    elif isinstance(data, list):
+        for value in data:
+            find_file_sizes(value, file_sizes)
+
+
+class FakeBotApiRequest(BaseRequest):
+    """Answers Bot API calls locally so recorded sessions replay offline.
+
+    Every call is counted by method. File downloads return generated images of
+    the size the recorded update reported."""
+
+    def __init__(self) -> None:
+        self.calls: Counter[str] = Counter()
+        self.file_sizes: dict[str, Tuple[int, int]] = dict()
+        self.message_ids = itertools.count(1)
+        self.file_ids = itertools.count(1)
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    def make_message(self, chat_id: Any, **fields: Any) -> dict[str, Any]:
+        chat_id = int(chat_id)
+        return {
+            "message_id": next(self.message_ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private" if chat_id > 0 else "supergroup"},
+            "from": FAKE_BOT_USER,
+            **fields,
+        }
+
+    def make_file(self) -> dict[str, Any]:
+        file_id = next(self.file_ids)
+        return {"file_id": f"sent-{file_id}", "file_unique_id": f"sent-{file_id}"}
+
+    def make_media(self, media_type: str) -> dict[str, Any]:
+        if media_type == "document":
+            return {"document": self.make_file()}
+
+        return {"photo": [{**self.make_file(), "width": 1280, "height": 1280}]}
+
+    def get_result(self, method: str, parameters: dict[str, Any]) -> Any:
+        if method == "getMe":
+            return FAKE_BOT_USER
+        if method in ("sendMessage", "editMessageText"):
+            return self.make_message(parameters["chat_id"], text=parameters["text"])
+        if method in ("sendPhoto", "sendDocument"):
+            return self.make_message(
+                parameters["chat_id"],
+                caption=parameters.get("caption"),
+                **self.make_media("photo" if method == "sendPhoto" else "document"),
+            )
+        if method == "sendMediaGroup":
+            return [
+                self.make_message(
+                    parameters["chat_id"],
+                    caption=media.get("caption"),
+                    **self.make_media(media["type"]),
+                )
+                for media in parameters["media"]
+            ]
+        if method == "getChatMember":
+            return {
+                "status": "member",
+                "user": {"id": parameters["user_id"], "is_bot": True, "first_name": ""},
+            }
+        if method == "getFile":
+            return {
+                "file_id": parameters["file_id"],
+                "file_unique_id": parameters["file_id"],
+                "file_path": f"files/{parameters['file_id']}",
+            }
+
+        # setMessageReaction, deleteMessage and the like only report success
+        return True
+
+    async def do_request(
+        self,
+        url: str,
+        method: str,
+        request_data: RequestData | None = None,
+        read_timeout: Any = None,
+        write_timeout: Any = None,
+        connect_timeout: Any = None,
+        pool_timeout: Any = None,
+    ) -> Tuple[int, bytes]:
+        api_method = url.rsplit("/", 1)[-1]
+
+        if method == "GET":
+            # file downloads are the only GET requests the bot makes
+            self.calls["download"] += 1
+            return 200, make_fake_file(
+                api_method, self.file_sizes.get(api_method, DEFAULT_FILE_SIZE)
+            )
+
+        self.calls[api_method] += 1
+        parameters = request_data.parameters if request_data is not None else {}
+        result = self.get_result(api_method, parameters)
+        return 200, json.dumps({"ok": True, "result": result}).encode()
+
+
+@dataclass
+class ReplayResult:
+    updates: int = 0
+    seconds: float = 0.0
+    calls: Counter[str] = field(default_factory=Counter)
+
+
+@contextlib.contextmanager
+def override_attributes(target: object, **values: Any) -> Iterator[None]:
+    original_values = {name: getattr(target, name) for name in values}
+    for name, value in values.items():
+        setattr(target, name, value)
+    try:
+        yield
+    finally:
+        for name, value in original_values.items():
+            setattr(target, name, value)
+
+
+@contextlib.contextmanager
+def replay_overrides() -> Iterator[None]:
+    """Never wait on timers and never record, cache or archive the replayed
+    sessions, the live configuration is restored afterwards."""
+    with (
+        override_attributes(
+            settings,
+            game_seed=settings.game_seed,
+            reveal_delay=0,
+            status_message_edit_interval=0,
+            record_updates_path=None,
+        ),
+        override_attributes(
+            upload_cache, path=None, file_ids=OrderedDict(), transient_hashes=set()
+        ),
+        override_attributes(game_archive, path=None),
+    ):
+        yield
+
+
+async def replay_session(session: RecordedSession) -> ReplayResult:
+    """Feed a recorded session to a fresh application as fast as it takes them."""
+    settings.game_seed = session.game_seed
+    request = FakeBotApiRequest()
+    app = build_application(request)
+    result = ReplayResult()
+
+    started_at = time.perf_counter()
+    async with app:
+        for data in session.updates:
+            find_file_sizes(data, request.file_sizes)
+            update = Update.de_json(data, app.bot)
+            # through the update processor like live updates, but one at a time
+            # so the order updates are handled in is the recorded one
+            await app.update_processor.process_update(
+                update, app.process_update(update)
+            )
+            result.updates += 1
+
+        # let deferred work like status message edits finish
+        pending = asyncio.all_tasks() - {asyncio.current_task()}
+        if len(pending) > 0:
+            _, still_pending = await asyncio.wait(pending, timeout=1)
+            for task in still_pending:
+                task.cancel()
+    result.seconds = time.perf_counter() - started_at
+    result.calls = request.calls
+
+    return result
+
+
+async def replay(path: str) -> List[ReplayResult]:
+    with replay_overrides():
+        return [await replay_session(session) for session in load_recording(path)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Replay a recorded update stream against a fake Bot API"
+    )
+    parser.add_argument("path", help="recording written with RECORD_UPDATES_PATH")
+    args = parser.parse_args()
+
+    for i, result in enumerate(asyncio.run(replay(args.path))):
+        print(
+            f"session {i + 1}: {result.updates} updates in {result.seconds:.2f} s "
+            f"({result.updates / max(result.seconds, 1e-9):.1f} updates/s)"
+        )
+        for method, count in result.calls.most_common():
+            print(f"  {method}: {count}")
+
+
+if __name__ == "__main__":
+    main()
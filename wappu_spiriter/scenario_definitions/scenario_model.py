@@ -1,24 +1,32 @@
 import random
-from copy import deepcopy
 from dataclasses import dataclass
-from typing import List, Tuple, TypedDict
+from typing import List, NotRequired, Tuple, TypedDict
 
 from PIL import Image
 
-from wappu_spiriter.image_related.manipulate_img import overlay_pil_image_on_base_image
+from wappu_spiriter.image_related.manipulate_img import (
+    FitMode,
+    load_template_layer,
+    paste_overlay,
+)
+from wappu_spiriter.image_related.resampling import ResamplingTier
 
 
 class SlotDefinition(TypedDict):
     position: Tuple[int, int]
     size: Tuple[int, int]
     prompts: List[str]
+    # how submissions are fitted into the slot, defaults to "cover"
+    fit: NotRequired[FitMode]
 
 
-@dataclass
+# per-team slot state, only references the shared definition's immutable values
+@dataclass(slots=True)
 class Slot:
     position: Tuple[int, int]
     size: Tuple[int, int]
     prompt: str
+    fit: FitMode = "cover"
     submitted_image: Image.Image | None = None
 
 
@@ -41,28 +49,42 @@ class ScenarioDefinition:
             len(slot["prompts"]) == first_slot_prompt_count for slot in self.slot_list
         )
 
-    def get_random_instruction_set_index(self):
-        return random.randint(0, self.prompts_count - 1)
+    def get_template_paths(self) -> List[str]:
+        if self.foreground_img_path is None:
+            return [self.background_img_path]
+
+        return [self.background_img_path, self.foreground_img_path]
+
+    def get_random_instruction_set_index(self, rng: random.Random | None = None):
+        if rng is None:
+            return random.randint(0, self.prompts_count - 1)
+
+        return rng.randint(0, self.prompts_count - 1)
 
 
 class Scenario:
+    __slots__ = ("scenario_definition", "instruction_set_index", "slots")
+
     def __init__(
         self,
         scenario_definition: ScenarioDefinition,
         instruction_set_index: int | None = None,
+        rng: random.Random | None = None,
     ):
         self.scenario_definition = scenario_definition
 
         if instruction_set_index is None:
             instruction_set_index = (
-                scenario_definition.get_random_instruction_set_index()
+                scenario_definition.get_random_instruction_set_index(rng)
             )
+        self.instruction_set_index = instruction_set_index
 
         self.slots = [
             Slot(
                 position=slot_opts["position"],
                 size=slot_opts["size"],
                 prompt=slot_opts["prompts"][instruction_set_index],
+                fit=slot_opts.get("fit", "cover"),
             )
             for slot_opts in self.scenario_definition.slot_list
         ]
@@ -70,31 +92,38 @@ class Scenario:
     def all_slots_filled(self):
         return all(slot.submitted_image is not None for slot in self.slots)
 
-    def compose_image(self):
+    def compose_image(self, resampling: ResamplingTier = "auto") -> Image.Image:
         assert self.all_slots_filled()
 
-        image = Image.open(self.scenario_definition.background_img_path)
+        image = load_template_layer(
+            self.scenario_definition.background_img_path,
+            self.scenario_definition.base_img_dimensions,
+        ).copy()
         for slot in self.slots:
             assert slot.submitted_image is not None
-            image = overlay_pil_image_on_base_image(
+            paste_overlay(
                 image,
                 slot.submitted_image,
                 (
                     slot.position,
                     (slot.position[0] + slot.size[0], slot.position[1] + slot.size[1]),
                 ),
+                resampling,
+                slot.fit,
             )
         if self.scenario_definition.foreground_img_path:
-            image = overlay_pil_image_on_base_image(
-                image,
-                Image.open(self.scenario_definition.foreground_img_path),
-                ((0, 0), self.scenario_definition.base_img_dimensions),
+            foreground = load_template_layer(
+                self.scenario_definition.foreground_img_path,
+                self.scenario_definition.base_img_dimensions,
             )
+            image.paste(foreground, (0, 0), foreground)
 
         return image
 
-    def clone(self):
-        return deepcopy(self)
+    def clone(self) -> "Scenario":
+        # fresh empty per-team state sharing the definition and instruction set,
+        # no deep traversal of the definition or submitted images
+        return Scenario(self.scenario_definition, self.instruction_set_index)
 
 
 jail_scenario = ScenarioDefinition(
@@ -293,3 +322,11 @@ scenario_definitions = [
     ullis_grilling_scenario,
     ullis_tree_scenario,
 ]
+
+
+def get_all_templates() -> List[Tuple[str, Tuple[int, int]]]:
+    return [
+        (path, scenario_definition.base_img_dimensions)
+        for scenario_definition in scenario_definitions
+        for path in scenario_definition.get_template_paths()
+    ]
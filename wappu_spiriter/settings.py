@@ -1,6 +1,13 @@
+import random
 from typing import Literal
+from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from wappu_spiriter.image_related.resampling import ResamplingTier
+
+# how the team composites of a round are revealed in the group chat
+RevealMode = Literal["sequential", "album", "collage"]
+
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
@@ -12,5 +19,69 @@ class Settings(BaseSettings):
     webhook_path: str = ""
     webhook_url: str | None = None
 
+    # every game's rng is seeded from this and its /new message, set it to
+    # reproduce a recorded session
+    game_seed: int = Field(
+        default_factory=lambda: random.SystemRandom().getrandbits(63)
+    )
+    # append every incoming update to this jsonl file for offline replay
+    record_updates_path: str | None = None
+
+    # updates handled at once, updates of a single game are always sequential
+    max_concurrent_updates: int = 8
+    # updates waiting or running before new ones get a "busy" reply
+    max_pending_updates: int = 256
+
+    # seconds between edits of a game's status message while players /join
+    status_message_edit_interval: float = 3.0
+    # seconds the bot's admin status in a chat is trusted without refetching
+    admin_status_cache_ttl: float = 600.0
+
+    # seconds a direct message waits for a user who hasn't started the bot
+    outbox_message_ttl: float = 3600.0
+    # backoff between background delivery attempts of waiting messages
+    outbox_retry_initial_delay: float = 30.0
+    outbox_retry_max_delay: float = 900.0
+
+    # json file mapping uploaded image content hashes to telegram file_ids. only
+    # entries sent with persist=True are written, round composites never are
+    upload_cache_path: str | None = "upload_cache.json"
+    # file_ids kept, least recently used are dropped first
+    upload_cache_max_entries: int = 10000
+    # seconds between background writes of the upload cache file
+    upload_cache_save_interval: float = 10.0
+
+    # sqlite file every finished round is appended to, backs /leaderboard
+    game_archive_path: str | None = "game_archive.sqlite3"
+    # score each team's result with the OpenAI API, needs OPENAI_API_KEY
+    score_results: bool = False
+
+    # first frames of animated and video stickers kept decoded in memory
+    sticker_frame_cache_size: int = 64
+
+    # "auto" picks fast resampling for large downscales and LANCZOS otherwise
+    resampling_tier: ResamplingTier = "auto"
+    # worker processes compositing round results, 0 renders in this process
+    render_workers: int = 0
+    # raw decoded templates, memory-mapped and shared by all render processes
+    template_cache_path: str | None = "template_cache.raw"
+    # teams, and so composites and reveals, per round however many players join.
+    # players beyond the slots of their team's scenario share a slot
+    max_teams_per_round: int = 6
+    # default for chats that haven't picked one with /reveal
+    reveal_mode: RevealMode = "sequential"
+    # seconds between team reveals in sequential mode
+    reveal_delay: float = 10.0
+    # longest side of the preview revealed first and sent to players' DMs
+    preview_max_size: int = 800
+    # follow each preview with the full resolution render as a file, off by
+    # default since it is an extra multi-MB upload per team every round. when
+    # off a button under the preview sends it on request instead
+    send_full_resolution: bool = False
+    # latest full resolution renders kept in memory for those buttons
+    requestable_full_resolutions: int = 24
+    # send each team's preview to its players' DMs as well
+    send_previews_to_players: bool = True
+
 
 settings = Settings()
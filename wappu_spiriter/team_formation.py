@@ -0,0 +1,56 @@
+import random
+from typing import Iterable, List, Tuple, TypeVar
+
+# groups this small play solo, bigger ones in pairs until the team limit
+SOLO_PLAYER_LIMIT = 3
+PREFERRED_TEAM_SIZE = 2
+
+SlotT = TypeVar("SlotT")
+PlayerT = TypeVar("PlayerT")
+
+
+def get_team_count(player_count: int, max_teams: int) -> int:
+    # team logic without a limit
+    # 1 => 1
+    # 2 => 1 + 1
+    # 3 => 1 + 1 + 1
+    # 4 => 2 + 2
+    # 5 => 3 + 2
+    # 6 => 2 + 2 + 2
+    # 7 => 3 + 2 + 2
+    if player_count <= SOLO_PLAYER_LIMIT:
+        team_count = player_count
+    else:
+        team_count = player_count // PREFERRED_TEAM_SIZE
+
+    return max(1, min(team_count, max_teams))
+
+
+def form_teams(
+    player_ids: Iterable[int], max_teams: int, rng: random.Random
+) -> List[List[int]]:
+    """Split players into at most `max_teams` teams whose sizes differ by one.
+
+    Each team is one composite and one reveal per round, so the limit bounds
+    the cost of a round however many players join."""
+    player_pool = sorted(player_ids)
+    rng.shuffle(player_pool)
+
+    team_count = get_team_count(len(player_pool), max_teams)
+    return [player_pool[i::team_count] for i in range(team_count)]
+
+
+def assign_slots(
+    slots: List[SlotT], players: List[PlayerT]
+) -> List[Tuple[SlotT, PlayerT]]:
+    """Pair slots with players so both are spread as evenly as possible.
+
+    Small teams get several slots per player. Teams with more players than
+    slots share them, every player gets one slot and the first submission
+    fills it."""
+    assert len(slots) > 0 and len(players) > 0
+
+    return [
+        (slots[i % len(slots)], players[i % len(players)])
+        for i in range(max(len(slots), len(players)))
+    ]
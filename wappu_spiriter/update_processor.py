@@ -0,0 +1,152 @@
+import asyncio
+import contextlib
+import inspect
+import logging
+import sys
+from collections import deque
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Hashable
+
+from telegram import Update, constants, error
+from telegram.ext import BaseUpdateProcessor
+
+if TYPE_CHECKING:
+    # game_context imports the game model, which releases worker slots below
+    from wappu_spiriter.game_context import BotState
+
+logger = logging.getLogger(__name__)
+
+BUSY_MESSAGE = "The bot is busy right now, please try again in a moment!"
+
+# worker slots the update handled by the current task holds
+current_workers: ContextVar[asyncio.Semaphore | None] = ContextVar(
+    "current_workers", default=None
+)
+
+
+@contextlib.asynccontextmanager
+async def worker_slot_released() -> AsyncIterator[None]:
+    """Lend the current update's worker slot to other updates while it only
+    waits. Its game's later updates still wait, the ordering lock is kept."""
+    workers = current_workers.get()
+    if workers is None:
+        yield
+        return
+
+    workers.release()
+    try:
+        yield
+    finally:
+        await workers.acquire()
+
+
+class GameOrderedUpdateProcessor(BaseUpdateProcessor):
+    """Processes updates concurrently across games but in order within a game.
+
+    The application's update fetcher hands every update over immediately, so
+    the webhook is never held up by slow handlers. Updates Telegram re-delivers
+    are dropped by `update_id`, and once `max_pending_updates` are waiting or
+    running new updates are answered with a busy reply instead of queued."""
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_pending_updates: int,
+        seen_update_ids_size: int = 1000,
+    ):
+        # the base semaphore only has to let updates through to the bounded
+        # queue below, the worker count is enforced by our own semaphore
+        super().__init__(sys.maxsize)
+        self.bot_state: BotState | None = None
+        self.max_pending_updates = max_pending_updates
+        self.pending_updates = 0
+
+        self._workers = asyncio.Semaphore(max_workers)
+        self._ordering_locks: dict[Hashable, asyncio.Lock] = dict()
+        self._ordering_lock_users: dict[Hashable, int] = dict()
+        self._seen_update_ids: set[int] = set()
+        self._seen_update_ids_order: deque[int] = deque(maxlen=seen_update_ids_size)
+
+    def get_ordering_key(self, update: object) -> Hashable:
+        if not isinstance(update, Update):
+            return None
+
+        chat = update.effective_chat
+        if chat is not None and chat.type != constants.ChatType.PRIVATE:
+            return ("chat", chat.id)
+
+        user = update.effective_user
+        if user is None:
+            return None
+
+        if self.bot_state is not None:
+            game_id = self.bot_state.user_id_to_game.get(user.id)
+            game = self.bot_state.games.get(game_id) if game_id else None
+            if game is not None:
+                return ("chat", game.game_chat_id)
+
+        return ("user", user.id)
+
+    def is_duplicate(self, update: object) -> bool:
+        if not isinstance(update, Update):
+            return False
+
+        if update.update_id in self._seen_update_ids:
+            return True
+
+        if len(self._seen_update_ids_order) == self._seen_update_ids_order.maxlen:
+            self._seen_update_ids.discard(self._seen_update_ids_order[0])
+        self._seen_update_ids_order.append(update.update_id)
+        self._seen_update_ids.add(update.update_id)
+
+        return False
+
+    async def shed_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        if inspect.iscoroutine(coroutine):
+            coroutine.close()
+
+        if not isinstance(update, Update) or update.effective_message is None:
+            return
+
+        logger.warning("Update queue full, shedding update %s", update.update_id)
+        try:
+            await update.effective_message.reply_text(BUSY_MESSAGE)
+        except error.TelegramError as e:
+            logger.warning("Could not send busy reply: %s", e)
+
+    async def do_process_update(
+        self, update: object, coroutine: Awaitable[Any]
+    ) -> None:
+        if self.is_duplicate(update):
+            if inspect.iscoroutine(coroutine):
+                coroutine.close()
+            return
+
+        if self.pending_updates >= self.max_pending_updates:
+            await self.shed_update(update, coroutine)
+            return
+
+        key = self.get_ordering_key(update)
+        lock = self._ordering_locks.setdefault(key, asyncio.Lock())
+        self._ordering_lock_users[key] = self._ordering_lock_users.get(key, 0) + 1
+        self.pending_updates += 1
+
+        try:
+            async with lock, self._workers:
+                token = current_workers.set(self._workers)
+                try:
+                    await coroutine
+                finally:
+                    current_workers.reset(token)
+        finally:
+            self.pending_updates -= 1
+            self._ordering_lock_users[key] -= 1
+            if self._ordering_lock_users[key] == 0:
+                del self._ordering_lock_users[key]
+                del self._ordering_locks[key]
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
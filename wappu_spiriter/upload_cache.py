@@ -0,0 +1,184 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+from typing import List, Sequence, Tuple
+
+from telegram import InlineKeyboardMarkup, InputMediaPhoto, Message, error
+from telegram.ext import ExtBot
+
+from wappu_spiriter.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+def get_content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+class UploadCache:
+    """Remembers the Telegram file_id of recently uploaded photos by content hash.
+
+    Sending the same bytes again reuses the file_id instead of uploading. At
+    most `max_entries` are kept, least recently used first out. Entries sent
+    with `persist=False` only live in memory, the rest are written as JSON to
+    `path` in the background, at most once per save interval. Round composites
+    are never sent again after a restart so the game doesn't persist any, the
+    file is for assets that are sent unchanged again and again."""
+
+    def __init__(self, path: str | None, max_entries: int) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.file_ids: OrderedDict[str, str] = OrderedDict()
+        # hashes of entries not worth keeping over a restart
+        self.transient_hashes: set[str] = set()
+        self.unsaved = False
+        self.save_task: asyncio.Task | None = None
+        self.closing = asyncio.Event()
+
+        if path is not None and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.file_ids.update(json.load(f))
+            except (OSError, ValueError) as e:
+                logger.warning("Could not load upload cache %s: %s", path, e)
+            self.evict()
+
+    def get(self, content: bytes) -> str | None:
+        content_hash = get_content_hash(content)
+        file_id = self.file_ids.get(content_hash)
+        if file_id is not None:
+            self.file_ids.move_to_end(content_hash)
+
+        return file_id
+
+    def set(self, content: bytes, file_id: str, persist: bool = True) -> None:
+        content_hash = get_content_hash(content)
+        self.file_ids[content_hash] = file_id
+        self.file_ids.move_to_end(content_hash)
+        if persist:
+            self.transient_hashes.discard(content_hash)
+            self.schedule_save()
+        else:
+            self.transient_hashes.add(content_hash)
+        self.evict()
+
+    def forget(self, content: bytes) -> None:
+        content_hash = get_content_hash(content)
+        self.file_ids.pop(content_hash, None)
+        if content_hash not in self.transient_hashes:
+            self.schedule_save()
+        self.transient_hashes.discard(content_hash)
+
+    def evict(self) -> None:
+        while len(self.file_ids) > self.max_entries:
+            content_hash, _ = self.file_ids.popitem(last=False)
+            if content_hash not in self.transient_hashes:
+                self.unsaved = True
+            self.transient_hashes.discard(content_hash)
+
+    def get_persisted_file_ids(self) -> dict[str, str]:
+        return {
+            content_hash: file_id
+            for content_hash, file_id in self.file_ids.items()
+            if content_hash not in self.transient_hashes
+        }
+
+    def save(self, file_ids: dict[str, str]) -> None:
+        if self.path is None:
+            return
+
+        temp_path = f"{self.path}.tmp"
+        try:
+            with open(temp_path, "w") as f:
+                json.dump(file_ids, f)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logger.warning("Could not save upload cache %s: %s", self.path, e)
+
+    def schedule_save(self) -> None:
+        # coalesce saves, at most one per interval written off the event loop
+        self.unsaved = True
+        if self.path is not None and (self.save_task is None or self.save_task.done()):
+            self.save_task = asyncio.create_task(self.flush_saves())
+
+    async def flush_saves(self) -> None:
+        while self.unsaved:
+            try:
+                await asyncio.wait_for(
+                    self.closing.wait(), settings.upload_cache_save_interval
+                )
+            except TimeoutError:
+                pass
+
+            self.unsaved = False
+            await asyncio.to_thread(self.save, self.get_persisted_file_ids())
+
+    async def close(self) -> None:
+        """Write any unsaved entries now instead of after the save interval."""
+        self.closing.set()
+        if self.save_task is not None:
+            await self.save_task
+        self.closing.clear()
+
+    async def send_photo(
+        self,
+        bot: ExtBot,
+        chat_id: int,
+        photo: bytes,
+        caption: str | None = None,
+        persist: bool = True,
+        reply_markup: InlineKeyboardMarkup | None = None,
+    ) -> Message:
+        file_id = self.get(photo)
+        if file_id is not None:
+            try:
+                return await bot.send_photo(
+                    chat_id, file_id, caption, reply_markup=reply_markup
+                )
+            except error.BadRequest as e:
+                logger.warning("Cached file_id rejected, uploading again: %s", e)
+                self.forget(photo)
+
+        message = await bot.send_photo(
+            chat_id, photo, caption, reply_markup=reply_markup
+        )
+        self.set(photo, message.photo[-1].file_id, persist)
+        return message
+
+    async def send_media_group(
+        self,
+        bot: ExtBot,
+        chat_id: int,
+        photos: Sequence[Tuple[bytes, str | None]],
+        persist: bool = True,
+    ) -> Tuple[Message, ...]:
+        media: List[InputMediaPhoto] = [
+            InputMediaPhoto(self.get(photo) or photo, caption)
+            for photo, caption in photos
+        ]
+
+        try:
+            messages = await bot.send_media_group(chat_id, media)
+        except error.BadRequest as e:
+            if all(self.get(photo) is None for photo, _ in photos):
+                raise
+
+            logger.warning("Cached file_id rejected, uploading again: %s", e)
+            for photo, _ in photos:
+                self.forget(photo)
+            media = [InputMediaPhoto(photo, caption) for photo, caption in photos]
+            messages = await bot.send_media_group(chat_id, media)
+
+        for (photo, _), message in zip(photos, messages):
+            if message.photo:
+                self.set(photo, message.photo[-1].file_id, persist)
+
+        return messages
+
+
+upload_cache = UploadCache(
+    settings.upload_cache_path, settings.upload_cache_max_entries
+)